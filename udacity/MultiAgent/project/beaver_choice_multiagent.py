@@ -14,24 +14,103 @@ import os
 import time
 import dotenv
 import ast
+import re
+import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
 from sqlalchemy.sql import text
-from datetime import datetime, timedelta
-from typing import Dict, List, Union, Optional, Any
-from sqlalchemy import create_engine, Engine
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Union, Optional, Any
+from sqlalchemy import create_engine, Engine, Connection, MetaData, Table
+from sqlalchemy.pool import QueuePool
 from dataclasses import dataclass, field
 from smolagents import OpenAIServerModel, ToolCallingAgent, tool
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; fall back to pandas' CSV reader
+    pa = None
+    pa_csv = None
+
 # Load environment variables
 dotenv.load_dotenv()
 
-# Database engine
-db_engine = create_engine("sqlite:///munder_difflin.db")
+# Database engine; a fixed-size pool (no overflow) so tool calls reuse connections
+db_engine = create_engine(
+    "sqlite:///munder_difflin.db",
+    poolclass=QueuePool,
+    pool_size=25,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+
+# Reflected table metadata, reused across hot reads
+_db_metadata = MetaData()
+
+@contextmanager
+def read_connection(conn: Optional[Connection] = None) -> Iterator[Connection]:
+    """Yield `conn` if the caller already holds one, else a pooled connection returned after the read"""
+    if conn is not None:
+        yield conn
+    else:
+        with db_engine.connect() as pooled:
+            yield pooled
+
+# Catalog cache; the inventory table is only rewritten by init_database, which bumps the version
+_inventory_version = 0
+_INVENTORY_CACHE = {"version": None, "by_name": {}}
+
+_STMT_CATALOG = text("SELECT item_name, category, unit_price, min_stock_level FROM inventory")
+
+def get_inventory_catalog() -> Dict[str, Dict]:
+    """Return the cached dict mapping item_name to its catalog row dict"""
+    if _INVENTORY_CACHE["version"] != _inventory_version:
+        # Plain per-item dicts straight from the cursor: O(1) lookups with no DataFrame build
+        with read_connection() as conn:
+            rows = conn.execute(_STMT_CATALOG).mappings().fetchall()
+        _INVENTORY_CACHE["by_name"] = {row["item_name"]: dict(row) for row in rows}
+        _INVENTORY_CACHE["version"] = _inventory_version
+    return _INVENTORY_CACHE["by_name"]
+
+# Per-date results of get_all_inventory / generate_financial_report, dropped whenever a transaction is written
+_transactions_version = 0
+_AS_OF_DATE_CACHE = {"version": None, "inventory": {}, "financial_report": {}}
+
+def _invalidate_transaction_caches() -> None:
+    """Mark per-date inventory and report results stale after a write to transactions"""
+    global _transactions_version
+    _transactions_version += 1
+
+def _as_of_date_cache(name: str) -> Dict:
+    """Return the per-date cache for `name`, emptying all of them if transactions changed"""
+    if _AS_OF_DATE_CACHE["version"] != _transactions_version:
+        _AS_OF_DATE_CACHE["inventory"] = {}
+        _AS_OF_DATE_CACHE["financial_report"] = {}
+        _AS_OF_DATE_CACHE["version"] = _transactions_version
+    return _AS_OF_DATE_CACHE[name]
+
+_STMT_ITEM = text("SELECT item_name, category, unit_price, min_stock_level FROM inventory WHERE item_name = :n LIMIT 1")
+
+def get_catalog_item(item_name: str):
+    """Look up one catalog row: from the warm catalog cache, else via an indexed single-row query"""
+    if _INVENTORY_CACHE["version"] == _inventory_version:
+        return _INVENTORY_CACHE["by_name"].get(item_name)
+    with read_connection() as conn:
+        row = conn.execute(_STMT_ITEM, {"n": item_name}).fetchone()
+    return None if row is None else row._mapping
+
+@lru_cache(maxsize=None)
+def get_table(table_name: str) -> Table:
+    """Reflect a table once and cache it; init_database clears the cache when tables are rebuilt"""
+    return Table(table_name, _db_metadata, autoload_with=db_engine)
 
 # ============================================================================
 # DATA CLASSES
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InventoryItem:
     """Represents an inventory item with pricing and stock information"""
     item_name: str
@@ -40,7 +119,7 @@ class InventoryItem:
     current_stock: int = 0
     min_stock_level: int = 100
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QuoteRequest:
     """Represents a customer quote request"""
     customer_request: str
@@ -49,16 +128,24 @@ class QuoteRequest:
     order_size: Optional[str] = None
     event_type: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class QuoteLine:
+    """Represents a single priced line item within a quote"""
+    item_name: str
+    quantity: int
+    unit_price: float
+    total: float
+
+@dataclass(slots=True, frozen=True)
 class Quote:
     """Represents a generated quote"""
-    items: List[Dict[str, Any]]
+    items: List[QuoteLine]
     total_amount: float
     quote_explanation: str
     estimated_delivery_date: str
     request_date: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SalesTransaction:
     """Represents a completed sales transaction"""
     item_name: str
@@ -68,7 +155,7 @@ class SalesTransaction:
     transaction_date: str
     customer_info: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StockOrder:
     """Represents a stock replenishment order"""
     item_name: str
@@ -138,6 +225,13 @@ paper_supplies = [
     {"item_name": "220 gsm poster paper",             "category": "specialty",    "unit_price": 0.35},
 ]
 
+def _render_catalog(supplies: list) -> str:
+    """Render the product catalog as a stable text block for agent prompts"""
+    lines = ["Stocked Products (exact item names, category, unit price):"]
+    for item in supplies:
+        lines.append(f"- {item['item_name']} ({item['category']}): ${item['unit_price']:.2f}/unit")
+    return "\n".join(lines)
+
 # ============================================================================
 # DATABASE UTILITY FUNCTIONS
 # ============================================================================
@@ -161,41 +255,86 @@ def generate_sample_inventory(paper_supplies: list, coverage: float = 0.4, seed:
     
     return pd.DataFrame(inventory)
 
+# Rendered once at import so every prompt shares a byte-identical prefix. It lists only
+# the items init_database stocks (same default seed); the tools reject everything else.
+CATALOG_PROMPT = _render_catalog(generate_sample_inventory(paper_supplies).to_dict("records"))
+
+METADATA_FIELDS = ("job_type", "order_size", "event_type")
+
+def _read_csv_with_ids(path: str, id_column: str) -> pd.DataFrame:
+    """Read a CSV and append a 1-based integer id column, using pyarrow's parser when available"""
+    if pa_csv is not None:
+        table = pa_csv.read_csv(path, parse_options=pa_csv.ParseOptions(newlines_in_values=True))
+        table = table.append_column(id_column, pa.array(range(1, table.num_rows + 1), type=pa.int64()))
+        return table.to_pandas()
+    df = pd.read_csv(path)
+    df[id_column] = np.arange(1, len(df) + 1, dtype=np.int64)
+    return df
+
+def _parse_request_metadata(raw) -> Dict[str, Any]:
+    """Parse a request_metadata cell (a Python-literal dict string) into a dict"""
+    if not isinstance(raw, str):
+        return raw or {}
+    return ast.literal_eval(raw)
+
 def init_database(db_engine: Engine, seed: int = 137) -> Engine:
     """Initialize the database with all required tables and initial data"""
+    global _inventory_version
     try:
-        # Create transactions table
-        transactions_schema = pd.DataFrame({
-            "id": [], "item_name": [], "transaction_type": [],
-            "units": [], "price": [], "transaction_date": []
-        })
-        transactions_schema.to_sql("transactions", db_engine, if_exists="replace", index=False)
+        # Create transactions table with explicit types; id aliases the rowid
+        with db_engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS transactions"))
+            conn.execute(text("""
+                CREATE TABLE transactions (
+                    id INTEGER PRIMARY KEY,
+                    item_name TEXT,
+                    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('stock_orders', 'sales')),
+                    units INTEGER,
+                    price REAL NOT NULL,
+                    transaction_date TEXT NOT NULL
+                )
+            """))
         
         initial_date = datetime(2025, 1, 1).isoformat()
         
         # Load quote requests
-        quote_requests_df = pd.read_csv("quote_requests.csv")
-        quote_requests_df["id"] = range(1, len(quote_requests_df) + 1)
+        quote_requests_df = _read_csv_with_ids("quote_requests.csv", "id")
+        quote_requests_df = quote_requests_df.astype(
+            {col: "category" for col in ("mood", "job", "need_size", "event") if col in quote_requests_df.columns}
+        )
         quote_requests_df.to_sql("quote_requests", db_engine, if_exists="replace", index=False)
         
         # Load quotes
-        quotes_df = pd.read_csv("quotes.csv")
-        quotes_df["request_id"] = range(1, len(quotes_df) + 1)
+        quotes_df = _read_csv_with_ids("quotes.csv", "request_id")
         quotes_df["order_date"] = initial_date
         
         if "request_metadata" in quotes_df.columns:
-            quotes_df["request_metadata"] = quotes_df["request_metadata"].apply(
-                lambda x: ast.literal_eval(x) if isinstance(x, str) else x
-            )
-            quotes_df["job_type"] = quotes_df["request_metadata"].apply(lambda x: x.get("job_type", ""))
-            quotes_df["order_size"] = quotes_df["request_metadata"].apply(lambda x: x.get("order_size", ""))
-            quotes_df["event_type"] = quotes_df["request_metadata"].apply(lambda x: x.get("event_type", ""))
+            # Parse each metadata dict once, then split into columns in a single vectorized assign
+            metadata = pd.json_normalize(quotes_df["request_metadata"].map(_parse_request_metadata).tolist())
+            metadata = metadata.reindex(columns=list(METADATA_FIELDS)).fillna("")
+            quotes_df[list(METADATA_FIELDS)] = metadata.to_numpy()
         
         quotes_df = quotes_df[["request_id", "total_amount", "quote_explanation", "order_date", "job_type", "order_size", "event_type"]]
+        quotes_df = quotes_df.astype({field: "category" for field in METADATA_FIELDS})
         quotes_df.to_sql("quotes", db_engine, if_exists="replace", index=False)
         
+        # Full-text index over request/explanation text for search_quote_history
+        with db_engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS quote_search"))
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE quote_search USING fts5("
+                "request_id UNINDEXED, response, quote_explanation, tokenize='porter unicode61')"
+            ))
+            conn.execute(text("""
+                INSERT INTO quote_search (request_id, response, quote_explanation)
+                SELECT qr.id, qr.response, q.quote_explanation
+                FROM quote_requests qr
+                JOIN quotes q ON q.request_id = qr.id
+            """))
+        
         # Generate inventory
         inventory_df = generate_sample_inventory(paper_supplies, seed=seed)
+        inventory_df = inventory_df.astype({"item_name": "category", "category": "category"})
         
         # Seed initial transactions
         initial_transactions = []
@@ -213,12 +352,42 @@ def init_database(db_engine: Engine, seed: int = 137) -> Engine:
         
         pd.DataFrame(initial_transactions).to_sql("transactions", db_engine, if_exists="append", index=False)
         inventory_df.to_sql("inventory", db_engine, if_exists="replace", index=False)
+        with db_engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_inventory_item_name ON inventory (item_name)"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_transactions_item_date ON transactions (item_name, transaction_date)"
+            ))
+        
+        # Tables were recreated, so drop any previously reflected schema and cached catalog
+        get_table.cache_clear()
+        _db_metadata.clear()
+        _inventory_version += 1
+        _invalidate_transaction_caches()
         
         return db_engine
     except Exception as e:
         print(f"Error initializing database: {e}")
         raise
 
+# INSERT ... RETURNING needs SQLite 3.35+; older builds fall back to last_insert_rowid()
+SQLITE_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+INSERT_TRANSACTION_RETURNING = text("""
+    INSERT INTO transactions (item_name, transaction_type, units, price, transaction_date)
+    VALUES (:item_name, :transaction_type, :units, :price, :transaction_date)
+    RETURNING id
+""")
+_STMT_LAST_INSERT_ROWID = text("SELECT last_insert_rowid()")
+_STMT_NEXT_TRANSACTION_ID = text("SELECT COALESCE(MAX(id), 0) + 1 FROM transactions")
+
+@lru_cache(maxsize=64)
+def _insert_transactions_returning(row_count: int):
+    """Build (once per row count) a multi-row INSERT ... RETURNING id over n0..n{k}, t0.., u0.., p0.., d0.. params"""
+    values_clause = ", ".join(f"(:n{i}, :t{i}, :u{i}, :p{i}, :d{i})" for i in range(row_count))
+    return text(
+        "INSERT INTO transactions (item_name, transaction_type, units, price, transaction_date) "
+        f"VALUES {values_clause} RETURNING id"
+    )
+
 def create_transaction(item_name: str, transaction_type: str, quantity: int, price: float, date: Union[str, datetime]) -> int:
     """Create a new transaction record"""
     try:
@@ -226,52 +395,171 @@ def create_transaction(item_name: str, transaction_type: str, quantity: int, pri
         if transaction_type not in {"stock_orders", "sales"}:
             raise ValueError("Transaction type must be 'stock_orders' or 'sales'")
         
-        transaction = pd.DataFrame([{
+        transaction = {
             "item_name": item_name, "transaction_type": transaction_type,
             "units": quantity, "price": price, "transaction_date": date_str
-        }])
+        }
         
-        transaction.to_sql("transactions", db_engine, if_exists="append", index=False)
-        result = pd.read_sql("SELECT last_insert_rowid() as id", db_engine)
-        return int(result.iloc[0]["id"])
+        with db_engine.begin() as conn:
+            if SQLITE_SUPPORTS_RETURNING:
+                transaction_id = int(conn.execute(INSERT_TRANSACTION_RETURNING, transaction).scalar())
+            else:
+                conn.execute(get_table("transactions").insert(), transaction)
+                transaction_id = int(conn.execute(_STMT_LAST_INSERT_ROWID).scalar())
+        _invalidate_transaction_caches()
+        return transaction_id
     except Exception as e:
         print(f"Error creating transaction: {e}")
         raise
 
-def get_all_inventory(as_of_date: str) -> Dict[str, int]:
-    """Get all inventory levels as of a specific date"""
-    query = """
-        SELECT item_name,
-               SUM(CASE WHEN transaction_type = 'stock_orders' THEN units
-                        WHEN transaction_type = 'sales' THEN -units
-                        ELSE 0 END) as stock
-        FROM transactions
-        WHERE item_name IS NOT NULL AND transaction_date <= :as_of_date
-        GROUP BY item_name
-        HAVING stock > 0
+def create_transactions(rows: List[Dict[str, Any]]) -> List[int]:
     """
-    result = pd.read_sql(query, db_engine, params={"as_of_date": as_of_date})
-    return dict(zip(result["item_name"], result["stock"]))
+    Record several transactions in one INSERT and one commit.
+    
+    Each row takes the same keys as create_transaction's arguments:
+    item_name, transaction_type, quantity, price and date.
+    Returns the new transaction IDs in row order.
+    """
+    if not rows:
+        return []
+    try:
+        records = []
+        for row in rows:
+            if row["transaction_type"] not in {"stock_orders", "sales"}:
+                raise ValueError("Transaction type must be 'stock_orders' or 'sales'")
+            date = row["date"]
+            records.append({
+                "item_name": row["item_name"], "transaction_type": row["transaction_type"],
+                "units": row["quantity"], "price": row["price"],
+                "transaction_date": date.isoformat() if isinstance(date, datetime) else date
+            })
+        
+        with db_engine.begin() as conn:
+            if SQLITE_SUPPORTS_RETURNING:
+                # One multi-row INSERT statement; RETURNING order is unspecified, but IDs ascend in row order
+                params = {}
+                for i, record in enumerate(records):
+                    params.update({
+                        f"n{i}": record["item_name"], f"t{i}": record["transaction_type"],
+                        f"u{i}": record["units"], f"p{i}": record["price"], f"d{i}": record["transaction_date"]
+                    })
+                result = conn.execute(_insert_transactions_returning(len(records)), params)
+                transaction_ids = sorted(int(row[0]) for row in result)
+            else:
+                # IDs are assigned sequentially inside the single write transaction
+                first_id = conn.execute(_STMT_NEXT_TRANSACTION_ID).scalar()
+                conn.execute(get_table("transactions").insert(), records)
+                transaction_ids = list(range(first_id, first_id + len(records)))
+        _invalidate_transaction_caches()
+        return transaction_ids
+    except Exception as e:
+        print(f"Error creating transactions: {e}")
+        raise
 
-def get_stock_level(item_name: str, as_of_date: Union[str, datetime]) -> pd.DataFrame:
+_STMT_ALL_INVENTORY = text("""
+    SELECT item_name,
+           SUM(CASE WHEN transaction_type = 'stock_orders' THEN units
+                    WHEN transaction_type = 'sales' THEN -units
+                    ELSE 0 END) as stock
+    FROM transactions
+    WHERE item_name IS NOT NULL AND transaction_date <= :as_of_date
+    GROUP BY item_name
+    HAVING stock > 0
+""")
+
+def get_all_inventory(as_of_date: str, conn: Optional[Connection] = None) -> Dict[str, int]:
+    """Get all inventory levels as of a specific date (memoized until the next transaction write)"""
+    cache = _as_of_date_cache("inventory")
+    if as_of_date in cache:
+        return dict(cache[as_of_date])
+    
+    with read_connection(conn) as conn:
+        result = pd.read_sql(_STMT_ALL_INVENTORY, conn, params={"as_of_date": as_of_date})
+    inventory = dict(zip(result["item_name"], result["stock"]))
+    cache[as_of_date] = inventory
+    return dict(inventory)
+
+_STMT_STOCK_LEVEL = text("""
+    SELECT item_name,
+           COALESCE(SUM(CASE WHEN transaction_type = 'stock_orders' THEN units
+                             WHEN transaction_type = 'sales' THEN -units
+                             ELSE 0 END), 0) AS current_stock
+    FROM transactions
+    WHERE item_name = :item_name AND transaction_date <= :as_of_date
+""")
+
+def get_stock_level(item_name: str, as_of_date: Union[str, datetime], conn: Optional[Connection] = None) -> pd.DataFrame:
     """Get stock level for a specific item"""
     if isinstance(as_of_date, datetime):
         as_of_date = as_of_date.isoformat()
     
-    query = """
-        SELECT item_name,
-               COALESCE(SUM(CASE WHEN transaction_type = 'stock_orders' THEN units
-                                 WHEN transaction_type = 'sales' THEN -units
-                                 ELSE 0 END), 0) AS current_stock
-        FROM transactions
-        WHERE item_name = :item_name AND transaction_date <= :as_of_date
+    with read_connection(conn) as conn:
+        return pd.read_sql(_STMT_STOCK_LEVEL, conn, params={"item_name": item_name, "as_of_date": as_of_date})
+
+_STMT_CURRENT_STOCK = text("""
+    SELECT COALESCE(SUM(CASE WHEN transaction_type = 'stock_orders' THEN units
+                             WHEN transaction_type = 'sales' THEN -units
+                             ELSE 0 END), 0)
+    FROM transactions
+    WHERE item_name = :item_name AND transaction_date <= :as_of_date
+""")
+
+def get_current_stock(item_name: str, as_of_date: Union[str, datetime], conn: Optional[Connection] = None) -> int:
+    """Get the stock level for a specific item as a plain int, without building a DataFrame"""
+    if isinstance(as_of_date, datetime):
+        as_of_date = as_of_date.isoformat()
+    with read_connection(conn) as conn:
+        stock = conn.execute(
+            _STMT_CURRENT_STOCK, {"item_name": item_name, "as_of_date": as_of_date}
+        ).scalar()
+    return int(stock)
+
+@lru_cache(maxsize=64)
+def _order_lines_query(item_count: int):
+    """Build (once per item count) the catalog + stock lookup over i0.., n0.., q0.. request params"""
+    values_clause = ", ".join(f"(:i{i}, :n{i}, :q{i})" for i in range(item_count))
+    # Stock is clamped at 0 to match get_all_inventory, which omits non-positive stock
+    return text(f"""
+        WITH req(position, item_name, quantity) AS (VALUES {values_clause})
+        SELECT req.item_name, req.quantity, inv.unit_price,
+               MAX(COALESCE((SELECT SUM(CASE WHEN t.transaction_type = 'stock_orders' THEN t.units
+                                             WHEN t.transaction_type = 'sales' THEN -t.units
+                                             ELSE 0 END)
+                             FROM transactions t
+                             WHERE t.item_name = req.item_name AND t.transaction_date <= :as_of_date), 0), 0) AS current_stock
+        FROM req
+        LEFT JOIN inventory inv ON inv.item_name = req.item_name
+        ORDER BY req.position
+    """)
+
+def get_order_lines(items_list: List[Dict[str, Any]], as_of_date: str, conn: Optional[Connection] = None) -> List[Dict]:
+    """
+    Resolve requested (item, quantity) pairs against the catalog and current stock in one query.
+    
+    Returns one dict per requested item, in request order, with item_name, quantity,
+    unit_price (None if the item is not in the catalog) and current_stock.
     """
-    return pd.read_sql(query, db_engine, params={"item_name": item_name, "as_of_date": as_of_date})
+    if not items_list:
+        return []
+    params = {"as_of_date": as_of_date}
+    for i, item_dict in enumerate(items_list):
+        params[f"i{i}"] = i
+        params[f"n{i}"] = item_dict["item"]
+        params[f"q{i}"] = item_dict["quantity"]
+    
+    with read_connection(conn) as conn:
+        result = conn.execute(_order_lines_query(len(items_list)), params)
+        return [dict(row._mapping) for row in result]
+
+@lru_cache(maxsize=1024)
+def parse_iso_date(date_str: str) -> date:
+    """Parse the date part of an ISO date/datetime string, memoized since tools re-parse the same request date"""
+    return date.fromisoformat(date_str.split("T")[0])
 
 def get_supplier_delivery_date(input_date_str: str, quantity: int) -> str:
     """Calculate supplier delivery date based on quantity"""
     try:
-        input_date_dt = datetime.fromisoformat(input_date_str.split("T")[0])
+        input_date_dt = parse_iso_date(input_date_str)
     except (ValueError, TypeError):
         input_date_dt = datetime.now()
     
@@ -287,57 +575,70 @@ def get_supplier_delivery_date(input_date_str: str, quantity: int) -> str:
     delivery_date_dt = input_date_dt + timedelta(days=days)
     return delivery_date_dt.strftime("%Y-%m-%d")
 
-def get_cash_balance(as_of_date: Union[str, datetime]) -> float:
+_STMT_CASH_TRANSACTIONS = text("SELECT transaction_type, price FROM transactions WHERE transaction_date <= :as_of_date")
+
+def get_cash_balance(as_of_date: Union[str, datetime], conn: Optional[Connection] = None) -> float:
     """Get current cash balance"""
     try:
         if isinstance(as_of_date, datetime):
             as_of_date = as_of_date.isoformat()
         
-        transactions = pd.read_sql(
-            "SELECT * FROM transactions WHERE transaction_date <= :as_of_date",
-            db_engine, params={"as_of_date": as_of_date}
-        )
+        with read_connection(conn) as conn:
+            transactions = pd.read_sql(
+                _STMT_CASH_TRANSACTIONS, conn, params={"as_of_date": as_of_date}
+            )
         
         if not transactions.empty:
-            total_sales = transactions.loc[transactions["transaction_type"] == "sales", "price"].sum()
-            total_purchases = transactions.loc[transactions["transaction_type"] == "stock_orders", "price"].sum()
-            return float(total_sales - total_purchases)
+            # Single pass: +price for sales, -price for stock orders, 0 for anything else
+            transaction_type = transactions["transaction_type"].to_numpy()
+            sign = (transaction_type == "sales").astype(np.int8) - (transaction_type == "stock_orders").astype(np.int8)
+            return float(np.nansum(sign * transactions["price"].to_numpy(dtype=np.float64)))
         return 0.0
     except Exception as e:
         print(f"Error getting cash balance: {e}")
         return 0.0
 
-def generate_financial_report(as_of_date: Union[str, datetime]) -> Dict:
-    """Generate comprehensive financial report"""
+# Stock for every catalog item in one grouped query instead of one query per item
+_STMT_STOCK_BY_ITEM = text("""
+    SELECT i.item_name, i.unit_price,
+           COALESCE(SUM(CASE WHEN t.transaction_type = 'stock_orders' THEN t.units
+                             WHEN t.transaction_type = 'sales' THEN -t.units
+                             ELSE 0 END), 0) AS stock
+    FROM inventory i
+    LEFT JOIN transactions t
+           ON t.item_name = i.item_name AND t.transaction_date <= :as_of_date
+    GROUP BY i.rowid
+    ORDER BY i.rowid
+""")
+_STMT_TOP_SALES = text("""
+    SELECT item_name, SUM(units) as total_units, SUM(price) as total_revenue
+    FROM transactions
+    WHERE transaction_type = 'sales' AND transaction_date <= :date
+    GROUP BY item_name
+    ORDER BY total_revenue DESC
+    LIMIT 5
+""")
+
+def generate_financial_report(as_of_date: Union[str, datetime], conn: Optional[Connection] = None) -> Dict:
+    """Generate comprehensive financial report (memoized until the next transaction write)"""
     if isinstance(as_of_date, datetime):
         as_of_date = as_of_date.isoformat()
     
-    cash = get_cash_balance(as_of_date)
-    inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
-    inventory_value = 0.0
-    inventory_summary = []
-    
-    for _, item in inventory_df.iterrows():
-        stock_info = get_stock_level(item["item_name"], as_of_date)
-        stock = stock_info["current_stock"].iloc[0]
-        item_value = stock * item["unit_price"]
-        inventory_value += item_value
-        inventory_summary.append({
-            "item_name": item["item_name"], "stock": stock,
-            "unit_price": item["unit_price"], "value": item_value
-        })
+    cache = _as_of_date_cache("financial_report")
+    if as_of_date in cache:
+        return dict(cache[as_of_date])
     
-    top_sales_query = """
-        SELECT item_name, SUM(units) as total_units, SUM(price) as total_revenue
-        FROM transactions
-        WHERE transaction_type = 'sales' AND transaction_date <= :date
-        GROUP BY item_name
-        ORDER BY total_revenue DESC
-        LIMIT 5
-    """
-    top_sales = pd.read_sql(top_sales_query, db_engine, params={"date": as_of_date})
+    with read_connection(conn) as conn:
+        cash = get_cash_balance(as_of_date, conn)
+        inventory_df = pd.read_sql(_STMT_STOCK_BY_ITEM, conn, params={"as_of_date": as_of_date})
+        top_sales = pd.read_sql(_STMT_TOP_SALES, conn, params={"date": as_of_date})
+    stock = inventory_df["stock"].to_numpy(dtype=np.float64)
+    unit_price = inventory_df["unit_price"].to_numpy(dtype=np.float64)
+    inventory_value = float(np.vdot(stock, unit_price))
+    inventory_df["value"] = stock * unit_price
+    inventory_summary = inventory_df[["item_name", "stock", "unit_price", "value"]].to_dict(orient="records")
     
-    return {
+    report = {
         "as_of_date": as_of_date,
         "cash_balance": cash,
         "inventory_value": inventory_value,
@@ -345,36 +646,75 @@ def generate_financial_report(as_of_date: Union[str, datetime]) -> Dict:
         "inventory_summary": inventory_summary,
         "top_selling_products": top_sales.to_dict(orient="records")
     }
+    cache[as_of_date] = report
+    return dict(report)
+
+def _fts_match_query(search_terms: List[str]) -> str:
+    """Build an FTS5 MATCH expression that requires every term (each quoted as a phrase)"""
+    phrases = []
+    for term in search_terms:
+        term = term.strip()
+        if term:
+            phrases.append('"' + term.replace('"', '""') + '"')
+    return " ".join(phrases)
+
+_STMT_SEARCH_QUOTES = text("""
+    SELECT qr.response AS original_request, q.total_amount, q.quote_explanation,
+           q.job_type, q.order_size, q.event_type, q.order_date
+    FROM quote_search s
+    JOIN quotes q ON q.request_id = s.request_id
+    JOIN quote_requests qr ON qr.id = s.request_id
+    WHERE quote_search MATCH :match_query
+    ORDER BY q.order_date DESC
+    LIMIT :limit
+""")
+_STMT_RECENT_QUOTES = text("""
+    SELECT qr.response AS original_request, q.total_amount, q.quote_explanation,
+           q.job_type, q.order_size, q.event_type, q.order_date
+    FROM quotes q
+    JOIN quote_requests qr ON q.request_id = qr.id
+    ORDER BY q.order_date DESC
+    LIMIT :limit
+""")
 
 def search_quote_history(search_terms: List[str], limit: int = 5) -> List[Dict]:
-    """Search historical quotes by keywords"""
-    conditions = []
-    params = {}
-    
-    for i, term in enumerate(search_terms):
-        param_name = f"term_{i}"
-        conditions.append(f"(LOWER(qr.response) LIKE :{param_name} OR LOWER(q.quote_explanation) LIKE :{param_name})")
-        params[param_name] = f"%{term.lower()}%"
-    
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
-    query = f"""
-        SELECT qr.response AS original_request, q.total_amount, q.quote_explanation,
-               q.job_type, q.order_size, q.event_type, q.order_date
-        FROM quotes q
-        JOIN quote_requests qr ON q.request_id = qr.id
-        WHERE {where_clause}
-        ORDER BY q.order_date DESC
-        LIMIT {limit}
-    """
+    """Search historical quotes by keywords using the quote_search FTS5 index"""
+    match_query = _fts_match_query(search_terms)
+    
+    if match_query:
+        stmt = _STMT_SEARCH_QUOTES
+        params = {"limit": limit, "match_query": match_query}
+    else:
+        stmt = _STMT_RECENT_QUOTES
+        params = {"limit": limit}
     
-    with db_engine.connect() as conn:
-        result = conn.execute(text(query), params)
+    with read_connection() as conn:
+        result = conn.execute(stmt, params)
         return [dict(row._mapping) for row in result]
 
 # ============================================================================
 # SMOLAGENTS TOOLS
 # ============================================================================
 
+# Customer delivery lead time by quantity: <=10 same day, <=100 1 day, <=1000 3 days, else 5 days
+QUOTE_DELIVERY_QTY_BINS = np.array([11, 101, 1001])
+QUOTE_DELIVERY_DAYS = np.array([0, 1, 3, 5])
+
+# One "item name:quantity" entry of a comma-separated order string
+_ITEM_SPEC_RE = re.compile(r"\s*([^:,]+?)\s*:\s*(\d+)\s*(?:,|$)")
+
+def parse_item_specs(items_and_quantities: str) -> List[Dict[str, Any]]:
+    """Parse "item1:qty1,item2:qty2" into [{"item": ..., "quantity": ...}, ...]; [] if any entry is malformed"""
+    items_list = []
+    end = 0
+    for match in _ITEM_SPEC_RE.finditer(items_and_quantities):
+        # Entries must follow each other directly; a gap means a malformed segment was skipped
+        if match.start() != end:
+            return []
+        items_list.append({"item": match.group(1), "quantity": int(match.group(2))})
+        end = match.end()
+    return items_list if end == len(items_and_quantities) else []
+
 @tool
 def check_inventory_status(item_name: str, request_date: str) -> str:
     """
@@ -389,27 +729,27 @@ def check_inventory_status(item_name: str, request_date: str) -> str:
     """
     try:
         # Get item info from inventory catalog
-        inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
-        item_info = inventory_df[inventory_df["item_name"] == item_name]
+        item_info = get_catalog_item(item_name)
         
-        if item_info.empty:
+        if item_info is None:
             return f"Item '{item_name}' not found in inventory catalog."
         
         # Get current stock level
-        stock_info = get_stock_level(item_name, request_date)
-        current_stock = int(stock_info["current_stock"].iloc[0])
-        unit_price = float(item_info["unit_price"].iloc[0])
-        min_stock = int(item_info["min_stock_level"].iloc[0])
+        current_stock = get_current_stock(item_name, request_date)
+        unit_price = float(item_info["unit_price"])
+        min_stock = int(item_info["min_stock_level"])
         
-        result = f"Item: {item_name}\n"
-        result += f"Current Stock: {current_stock} units\n"
-        result += f"Unit Price: ${unit_price:.2f}\n"
-        result += f"Minimum Stock Level: {min_stock} units\n"
+        lines = [
+            f"Item: {item_name}",
+            f"Current Stock: {current_stock} units",
+            f"Unit Price: ${unit_price:.2f}",
+            f"Minimum Stock Level: {min_stock} units",
+        ]
         
         if current_stock < min_stock:
-            result += f"⚠️ WARNING: Stock is below minimum level. Reorder recommended.\n"
+            lines.append("⚠️ WARNING: Stock is below minimum level. Reorder recommended.")
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error checking inventory: {str(e)}"
 
@@ -426,19 +766,18 @@ def get_all_available_items(request_date: str) -> str:
     """
     try:
         inventory = get_all_inventory(request_date)
-        inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
+        catalog = get_inventory_catalog()
         
-        result = "Available Inventory:\n"
-        result += "=" * 80 + "\n"
+        lines = ["Available Inventory:", "=" * 80]
         
         for item_name, stock in inventory.items():
-            item_info = inventory_df[inventory_df["item_name"] == item_name]
-            if not item_info.empty:
-                price = float(item_info["unit_price"].iloc[0])
-                category = item_info["category"].iloc[0]
-                result += f"- {item_name} ({category}): {stock} units @ ${price:.2f}/unit\n"
+            item_info = catalog.get(item_name)
+            if item_info is not None:
+                price = float(item_info["unit_price"])
+                category = item_info["category"]
+                lines.append(f"- {item_name} ({category}): {stock} units @ ${price:.2f}/unit")
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error getting inventory list: {str(e)}"
 
@@ -457,13 +796,12 @@ def reorder_inventory(item_name: str, quantity: int, request_date: str) -> str:
     """
     try:
         # Get item pricing
-        inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
-        item_info = inventory_df[inventory_df["item_name"] == item_name]
+        item_info = get_catalog_item(item_name)
         
-        if item_info.empty:
+        if item_info is None:
             return f"Error: Item '{item_name}' not found in catalog."
         
-        unit_price = float(item_info["unit_price"].iloc[0])
+        unit_price = float(item_info["unit_price"])
         total_cost = unit_price * quantity
         
         # Check if we have enough cash
@@ -483,16 +821,18 @@ def reorder_inventory(item_name: str, quantity: int, request_date: str) -> str:
             date=delivery_date
         )
         
-        result = f"✓ Stock order placed successfully!\n"
-        result += f"Transaction ID: {transaction_id}\n"
-        result += f"Item: {item_name}\n"
-        result += f"Quantity: {quantity} units\n"
-        result += f"Unit Price: ${unit_price:.2f}\n"
-        result += f"Total Cost: ${total_cost:.2f}\n"
-        result += f"Order Date: {request_date}\n"
-        result += f"Expected Delivery: {delivery_date}\n"
+        lines = [
+            "✓ Stock order placed successfully!",
+            f"Transaction ID: {transaction_id}",
+            f"Item: {item_name}",
+            f"Quantity: {quantity} units",
+            f"Unit Price: ${unit_price:.2f}",
+            f"Total Cost: ${total_cost:.2f}",
+            f"Order Date: {request_date}",
+            f"Expected Delivery: {delivery_date}",
+        ]
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error placing stock order: {str(e)}"
 
@@ -514,17 +854,19 @@ def search_historical_quotes(keywords: str) -> str:
         if not quotes:
             return "No matching historical quotes found."
         
-        result = f"Found {len(quotes)} relevant historical quotes:\n"
-        result += "=" * 80 + "\n"
+        lines = [f"Found {len(quotes)} relevant historical quotes:", "=" * 80]
         
         for i, quote in enumerate(quotes, 1):
-            result += f"\n{i}. Request: {quote['original_request'][:100]}...\n"
-            result += f"   Total Amount: ${quote['total_amount']:.2f}\n"
-            result += f"   Job Type: {quote.get('job_type', 'N/A')}\n"
-            result += f"   Order Size: {quote.get('order_size', 'N/A')}\n"
-            result += f"   Explanation: {quote['quote_explanation'][:150]}...\n"
+            lines.extend((
+                "",
+                f"{i}. Request: {quote['original_request'][:100]}...",
+                f"   Total Amount: ${quote['total_amount']:.2f}",
+                f"   Job Type: {quote.get('job_type', 'N/A')}",
+                f"   Order Size: {quote.get('order_size', 'N/A')}",
+                f"   Explanation: {quote['quote_explanation'][:150]}...",
+            ))
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error searching quotes: {str(e)}"
 
@@ -542,88 +884,86 @@ def generate_customer_quote(items_and_quantities: str, request_date: str) -> str
     """
     try:
         # Parse items and quantities
-        items_list = []
-        for item_spec in items_and_quantities.split(","):
-            parts = item_spec.strip().split(":")
-            if len(parts) == 2:
-                items_list.append({"item": parts[0].strip(), "quantity": int(parts[1].strip())})
+        items_list = parse_item_specs(items_and_quantities)
         
         if not items_list:
             return "Error: Invalid format. Use 'item1:qty1,item2:qty2'"
         
-        # Get inventory and pricing
-        inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
-        current_inventory = get_all_inventory(request_date)
+        # Get pricing and stock for all requested items in one query
+        order_lines = get_order_lines(items_list, request_date)
         
-        quote_items = []
-        total_amount = 0.0
+        available_lines = []
         unavailable_items = []
-        max_delivery_days = 0
         
-        for item_dict in items_list:
-            item_name = item_dict["item"]
-            quantity = item_dict["quantity"]
+        for line in order_lines:
+            item_name = line["item_name"]
+            quantity = line["quantity"]
             
             # Check if item exists in catalog
-            item_info = inventory_df[inventory_df["item_name"] == item_name]
-            if item_info.empty:
+            if line["unit_price"] is None:
                 unavailable_items.append(f"{item_name} (not in catalog)")
                 continue
             
-            unit_price = float(item_info["unit_price"].iloc[0])
-            available_stock = current_inventory.get(item_name, 0)
+            unit_price = float(line["unit_price"])
+            available_stock = int(line["current_stock"])
             
             if available_stock < quantity:
                 unavailable_items.append(f"{item_name} (only {available_stock} available, need {quantity})")
                 continue
             
-            # Calculate delivery time based on quantity
-            if quantity <= 10:
-                delivery_days = 0
-            elif quantity <= 100:
-                delivery_days = 1
-            elif quantity <= 1000:
-                delivery_days = 3
-            else:
-                delivery_days = 5
-            
-            max_delivery_days = max(max_delivery_days, delivery_days)
-            
-            item_total = unit_price * quantity
-            total_amount += item_total
-            
-            quote_items.append({
-                "item": item_name,
-                "quantity": quantity,
-                "unit_price": unit_price,
-                "total": item_total
-            })
+            available_lines.append((item_name, quantity, unit_price))
+        
+        # Line totals and delivery time (bucketed by quantity) for all available items at once
+        quantities = np.fromiter((line[1] for line in available_lines), dtype=np.int64, count=len(available_lines))
+        unit_prices = np.fromiter((line[2] for line in available_lines), dtype=np.float64, count=len(available_lines))
+        item_totals = quantities * unit_prices
+        delivery_days = QUOTE_DELIVERY_DAYS[np.digitize(quantities, QUOTE_DELIVERY_QTY_BINS)]
+        max_delivery_days = int(delivery_days.max(initial=0))
+        total_amount = float(item_totals.sum())
         
         # Calculate delivery date
-        delivery_date = (datetime.fromisoformat(request_date) + timedelta(days=max_delivery_days)).strftime("%Y-%m-%d")
+        delivery_date = (parse_iso_date(request_date) + timedelta(days=max_delivery_days)).isoformat()
+        
+        quote = Quote(
+            items=[
+                QuoteLine(item_name=item_name, quantity=quantity, unit_price=unit_price, total=float(item_total))
+                for (item_name, quantity, unit_price), item_total in zip(available_lines, item_totals)
+            ],
+            total_amount=total_amount,
+            # Explains which requested items were left out of the quote, and why
+            quote_explanation="\n".join(f"  - {item}" for item in unavailable_items),
+            estimated_delivery_date=delivery_date,
+            request_date=request_date,
+        )
         
         # Build quote response
-        result = "QUOTE DETAILS\n"
-        result += "=" * 80 + "\n"
-        result += f"Quote Date: {request_date}\n"
-        result += f"Estimated Delivery: {delivery_date}\n\n"
-        
-        if quote_items:
-            result += "Items:\n"
-            for item in quote_items:
-                result += f"  - {item['item']}: {item['quantity']} units @ ${item['unit_price']:.2f} = ${item['total']:.2f}\n"
+        lines = [
+            "QUOTE DETAILS",
+            "=" * 80,
+            f"Quote Date: {quote.request_date}",
+            f"Estimated Delivery: {quote.estimated_delivery_date}",
+            "",
+        ]
+        
+        if quote.items:
+            lines.append("Items:")
+            lines.extend(
+                f"  - {line.item_name}: {line.quantity} units @ ${line.unit_price:.2f} = ${line.total:.2f}"
+                for line in quote.items
+            )
             
-            result += f"\nSubtotal: ${total_amount:.2f}\n"
-            tax = total_amount * 0.08  # 8% tax
-            result += f"Tax (8%): ${tax:.2f}\n"
-            result += f"TOTAL: ${total_amount + tax:.2f}\n"
+            tax = quote.total_amount * 0.08  # 8% tax
+            lines.extend((
+                "",
+                f"Subtotal: ${quote.total_amount:.2f}",
+                f"Tax (8%): ${tax:.2f}",
+                f"TOTAL: ${quote.total_amount + tax:.2f}",
+            ))
         
-        if unavailable_items:
-            result += f"\n⚠️ Unavailable Items:\n"
-            for item in unavailable_items:
-                result += f"  - {item}\n"
+        if quote.quote_explanation:
+            lines.extend(("", "⚠️ Unavailable Items:", quote.quote_explanation))
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error generating quote: {str(e)}"
 
@@ -641,69 +981,64 @@ def finalize_sale(items_and_quantities: str, request_date: str) -> str:
     """
     try:
         # Parse items
-        items_list = []
-        for item_spec in items_and_quantities.split(","):
-            parts = item_spec.strip().split(":")
-            if len(parts) == 2:
-                items_list.append({"item": parts[0].strip(), "quantity": int(parts[1].strip())})
+        items_list = parse_item_specs(items_and_quantities)
         
         if not items_list:
             return "Error: Invalid format. Use 'item1:qty1,item2:qty2'"
         
-        # Get inventory
-        inventory_df = pd.read_sql("SELECT * FROM inventory", db_engine)
-        current_inventory = get_all_inventory(request_date)
+        # Get pricing and stock for all requested items in one query
+        order_lines = get_order_lines(items_list, request_date)
         
-        transaction_ids = []
+        pending_sales = []
         total_revenue = 0.0
         errors = []
         
-        for item_dict in items_list:
-            item_name = item_dict["item"]
-            quantity = item_dict["quantity"]
+        for line in order_lines:
+            item_name = line["item_name"]
+            quantity = line["quantity"]
             
             # Validate item
-            item_info = inventory_df[inventory_df["item_name"] == item_name]
-            if item_info.empty:
+            if line["unit_price"] is None:
                 errors.append(f"{item_name}: not in catalog")
                 continue
             
-            unit_price = float(item_info["unit_price"].iloc[0])
-            available_stock = current_inventory.get(item_name, 0)
+            unit_price = float(line["unit_price"])
+            available_stock = int(line["current_stock"])
             
             if available_stock < quantity:
                 errors.append(f"{item_name}: insufficient stock (available: {available_stock}, requested: {quantity})")
                 continue
             
-            # Create sales transaction
+            # Queue sales transaction; all line items are written together below
             sale_total = unit_price * quantity
-            transaction_id = create_transaction(
-                item_name=item_name,
-                transaction_type="sales",
-                quantity=quantity,
-                price=sale_total,
-                date=request_date
-            )
-            
-            transaction_ids.append(transaction_id)
+            pending_sales.append({
+                "item_name": item_name,
+                "transaction_type": "sales",
+                "quantity": quantity,
+                "price": sale_total,
+                "date": request_date
+            })
             total_revenue += sale_total
         
+        transaction_ids = create_transactions(pending_sales)
+        
         # Build response
-        result = "SALE COMPLETED\n"
-        result += "=" * 80 + "\n"
-        result += f"Transaction Date: {request_date}\n"
-        result += f"Transaction IDs: {', '.join(map(str, transaction_ids))}\n"
-        result += f"Total Revenue: ${total_revenue:.2f}\n"
+        lines = [
+            "SALE COMPLETED",
+            "=" * 80,
+            f"Transaction Date: {request_date}",
+            f"Transaction IDs: {', '.join(map(str, transaction_ids))}",
+            f"Total Revenue: ${total_revenue:.2f}",
+        ]
         
         if errors:
-            result += f"\n⚠️ Errors:\n"
-            for error in errors:
-                result += f"  - {error}\n"
+            lines.extend(("", "⚠️ Errors:"))
+            lines.extend(f"  - {error}" for error in errors)
         
         # Update inventory and check for reorder needs
-        result += f"\n✓ Sale processed successfully!\n"
+        lines.extend(("", "✓ Sale processed successfully!"))
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error processing sale: {str(e)}"
 
@@ -721,19 +1056,25 @@ def get_current_financial_status(request_date: str) -> str:
     try:
         report = generate_financial_report(request_date)
         
-        result = "FINANCIAL STATUS REPORT\n"
-        result += "=" * 80 + "\n"
-        result += f"Report Date: {report['as_of_date']}\n\n"
-        result += f"Cash Balance: ${report['cash_balance']:.2f}\n"
-        result += f"Inventory Value: ${report['inventory_value']:.2f}\n"
-        result += f"Total Assets: ${report['total_assets']:.2f}\n\n"
+        lines = [
+            "FINANCIAL STATUS REPORT",
+            "=" * 80,
+            f"Report Date: {report['as_of_date']}",
+            "",
+            f"Cash Balance: ${report['cash_balance']:.2f}",
+            f"Inventory Value: ${report['inventory_value']:.2f}",
+            f"Total Assets: ${report['total_assets']:.2f}",
+            "",
+        ]
         
         if report['top_selling_products']:
-            result += "Top Selling Products:\n"
-            for product in report['top_selling_products']:
-                result += f"  - {product['item_name']}: {product['total_units']} units, ${product['total_revenue']:.2f} revenue\n"
+            lines.append("Top Selling Products:")
+            lines.extend(
+                f"  - {product['item_name']}: {product['total_units']} units, ${product['total_revenue']:.2f} revenue"
+                for product in report['top_selling_products']
+            )
         
-        return result
+        return "\n".join(lines) + "\n"
     except Exception as e:
         return f"Error generating financial report: {str(e)}"
 
@@ -748,6 +1089,29 @@ model = OpenAIServerModel(
     api_base="https://api.openai.com/v1"
 )
 
+# Request-independent orchestrator instructions. They are installed in the agent's
+# system prompt, so every LLM call starts with the same prefix and hits the provider's prompt cache.
+ORCHESTRATOR_PROMPT_PREFIX = f"""
+You are the main orchestrator for Beaver's Choice Paper Company. Process each customer request you are given.
+
+Your tasks:
+1. If the request is about inventory status or checking stock, use inventory tools
+2. If the request asks for a quote, search historical quotes for context, check inventory availability, and generate a detailed quote
+3. If the request is to complete a purchase/sale, verify inventory, finalize the sale, and check if reordering is needed
+4. Always provide clear, professional responses with specific details
+
+Important guidelines:
+- Check current inventory availability before making commitments
+- Review historical quotes for similar requests to ensure competitive pricing
+- After completing a sale, check if any items need reordering (below minimum stock levels)
+- Always include relevant dates in your response
+- Be specific about quantities, prices, and delivery timelines
+- Use the exact item names from the list below when calling tools
+- Only the items listed below are stocked; tell the customer when they ask for anything else instead of quoting or selling it
+
+{CATALOG_PROMPT}
+"""
+
 # ============================================================================
 # SPECIALIZED AGENTS
 # ============================================================================
@@ -792,7 +1156,8 @@ orchestrator_agent = ToolCallingAgent(
     ],
     model=model,
     name="orchestrator",
-    description="Main orchestrator that coordinates all operations for Beaver's Choice Paper Company"
+    description="Main orchestrator that coordinates all operations for Beaver's Choice Paper Company",
+    instructions=ORCHESTRATOR_PROMPT_PREFIX
 )
 
 # ============================================================================
@@ -811,27 +1176,12 @@ def process_customer_request(request: str, request_date: str) -> str:
         The agent's response
     """
     try:
-        # Create a comprehensive prompt for the orchestrator
+        # Static instructions and catalog live in the system prompt; only per-request details go here
         prompt = f"""
-You are the main orchestrator for Beaver's Choice Paper Company. Process the following customer request.
-
 Current Date: {request_date}
 
 Customer Request: {request}
 
-Your tasks:
-1. If the request is about inventory status or checking stock, use inventory tools
-2. If the request asks for a quote, search historical quotes for context, check inventory availability, and generate a detailed quote
-3. If the request is to complete a purchase/sale, verify inventory, finalize the sale, and check if reordering is needed
-4. Always provide clear, professional responses with specific details
-
-Important guidelines:
-- Check current inventory availability before making commitments
-- Review historical quotes for similar requests to ensure competitive pricing
-- After completing a sale, check if any items need reordering (below minimum stock levels)
-- Always include relevant dates in your response
-- Be specific about quantities, prices, and delivery timelines
-
 Now process the request and provide a comprehensive response.
 """
         
@@ -845,8 +1195,29 @@ Now process the request and provide a comprehensive response.
 # TEST SCENARIOS
 # ============================================================================
 
-def run_test_scenarios():
-    """Run the multi-agent system through test scenarios"""
+class RateLimiter:
+    """Limiter that spaces call starts evenly to stay under a requests-per-minute budget"""
+    
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = time.monotonic()
+    
+    def wait(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def run_test_scenarios(requests_per_minute: int = 30):
+    """
+    Run the multi-agent system through test scenarios.
+    
+    Requests are processed one at a time in request-date order, since each one
+    reads and updates the stock and cash left by the ones before it. Request
+    starts are paced by a `requests_per_minute` limiter rather than a fixed
+    sleep after every request.
+    """
     print("\n" + "=" * 80)
     print("BEAVER'S CHOICE PAPER COMPANY - MULTI-AGENT SYSTEM")
     print("=" * 80 + "\n")
@@ -856,12 +1227,14 @@ def run_test_scenarios():
     
     try:
         # Load test data
-        quote_requests_sample = pd.read_csv("quote_requests_sample.csv")
+        # pyarrow's reader when available; dates are parsed afterwards so malformed ones become NaT
+        quote_requests_sample = pd.read_csv(
+            "quote_requests_sample.csv", engine="pyarrow" if pa is not None else "c"
+        )
         quote_requests_sample["request_date"] = pd.to_datetime(
             quote_requests_sample["request_date"], format="%m/%d/%y", errors="coerce"
         )
-        quote_requests_sample.dropna(subset=["request_date"], inplace=True)
-        quote_requests_sample = quote_requests_sample.sort_values("request_date")
+        quote_requests_sample = quote_requests_sample.dropna(subset=["request_date"]).sort_values("request_date")
         
         print(f"✓ Loaded {len(quote_requests_sample)} test requests\n")
     except Exception as e:
@@ -879,6 +1252,7 @@ def run_test_scenarios():
     print(f"  Inventory Value: ${current_inventory:.2f}")
     print(f"  Total Assets: ${current_cash + current_inventory:.2f}\n")
     
+    limiter = RateLimiter(requests_per_minute)
     results = []
     
     for idx, row in quote_requests_sample.iterrows():
@@ -896,6 +1270,7 @@ def run_test_scenarios():
         
         # Process request through multi-agent system
         request_with_date = f"{row['request']} (Date of request: {request_date})"
+        limiter.wait()
         
         try:
             response = process_customer_request(request_with_date, request_date)
@@ -923,8 +1298,6 @@ def run_test_scenarios():
             "inventory_value": current_inventory,
             "response": response
         })
-        
-        time.sleep(2)  # Rate limiting
     
     # Final report
     final_date = quote_requests_sample["request_date"].max().strftime("%Y-%m-%d")
@@ -2,6 +2,7 @@ from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import json
+from functools import lru_cache
 from lib.messages import UserMessage, SystemMessage, ToolMessage, AIMessage
 from lib.tooling import tool
 from lib.llm import LLM
@@ -10,6 +11,21 @@ load_dotenv()
 
 temperature = 0 
 
+# Argument strings above this size are decoded directly instead of cached
+MAX_CACHED_ARGS_LENGTH = 1024
+
+
+@lru_cache(maxsize=128)
+def _cached_parse_args(raw: str) -> Dict[str, Any]:
+    return json.loads(raw)
+
+
+def _parse_args(raw: str) -> Dict[str, Any]:
+    """Decode tool-call arguments, reusing results for repeated strings."""
+    if len(raw) > MAX_CACHED_ARGS_LENGTH:
+        return json.loads(raw)
+    return _cached_parse_args(raw)
+
 class Agent:
     def __init__(self, role: str, tools: List = None):
         self.role = role
@@ -38,7 +54,7 @@ class Agent:
             # Execute each tool call
             for tool_call in response.tool_calls:
                 tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
+                tool_args = _parse_args(tool_call.function.arguments)
                 
                 # Execute the tool
                 if tool_name in self.tool_map:
@@ -1,8 +1,14 @@
+import atexit
 import os
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from lib.agents import Agent
 from lib.messages import BaseMessage
@@ -11,6 +17,68 @@ from lib.tooling import tool
 load_dotenv()
 
 
+# ============================================================================
+# HTTP Session
+# ============================================================================
+
+# Shared session so repeated tool calls reuse pooled keep-alive connections
+# instead of paying a new TCP+TLS handshake per request. The agent runs tool
+# calls from one turn on separate threads; urllib3's pools are thread-safe and
+# sized so concurrent calls to one host don't queue behind each other.
+REQUEST_TIMEOUT = 5
+
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    ),
+)
+atexit.register(_SESSION.close)
+
+
+# ============================================================================
+# Response Caches
+# ============================================================================
+
+class _TTLCache:
+    """Small thread-safe cache whose entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, key, value):
+        """Store `value` under `key`, evicting the oldest entry when full."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic(), value)
+
+
+# Only successful responses are cached. Weather and exchange rates change
+# slowly, so a repeated question in a session skips the API round trip.
+_WEATHER_CACHE = _TTLCache(ttl=600)
+_EXCHANGE_RATE_CACHE = _TTLCache(ttl=300)
+
+# The original 151 Pokemon never change; fetch the list once per process
+POKEMON_LIST_URL = "https://pokeapi.co/api/v2/pokemon?limit=151"
+_POKEMON_LIST: tuple | None = None
+
+
 # ============================================================================
 # External API Tool Definitions
 # ============================================================================
@@ -38,10 +106,17 @@ def get_weather(city: str) -> dict:
         "units": "metric"
     }
     
+    cache_key = city.strip().lower()
+    cached = _WEATHER_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        response = requests.get(BASE_URL, params=params)
+        response = _SESSION.get(BASE_URL, params=params, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        _WEATHER_CACHE.put(cache_key, data)
+        return data
     except requests.RequestException as e:
         return {"error": f"Failed to fetch weather: {str(e)}"}
 
@@ -64,14 +139,30 @@ def get_exchange_rate(from_currency: str = "USD") -> dict:
     
     url = f"{BASE_URL}/{API_KEY}/latest/{from_currency}"
     
+    cached = _EXCHANGE_RATE_CACHE.get(from_currency.upper())
+    if cached is not None:
+        return cached
+    
     try:
-        response = requests.get(url)
+        response = _SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        _EXCHANGE_RATE_CACHE.put(from_currency.upper(), data)
+        return data
     except requests.RequestException as e:
         return {"error": f"Failed to fetch exchange rates: {str(e)}"}
 
 
+def _get_pokemon_list() -> tuple:
+    """Return the cached Pokemon list, fetching it on first use."""
+    global _POKEMON_LIST
+    if _POKEMON_LIST is None:
+        response = _SESSION.get(POKEMON_LIST_URL, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        _POKEMON_LIST = tuple(response.json()['results'])
+    return _POKEMON_LIST
+
+
 @tool
 def get_random_pokemon() -> dict:
     """Get a random Pokemon from the original 151.
@@ -79,12 +170,8 @@ def get_random_pokemon() -> dict:
     Returns:
         Dictionary containing name and URL for a random Pokemon
     """
-    URL = "https://pokeapi.co/api/v2/pokemon?limit=151"
-    
     try:
-        response = requests.get(URL)
-        response.raise_for_status()
-        return random.choice(response.json()['results'])
+        return random.choice(_get_pokemon_list())
     except requests.RequestException as e:
         return {"error": f"Failed to fetch Pokemon: {str(e)}"}
 
@@ -122,50 +209,41 @@ def demo_external_api_agent():
         tools=tools
     )
     
-    session_id = "external_api_demo"
-    
-    # Query 1: Weather
-    print("\n--- Query 1: Weather Information ---")
-    query1 = "What's the weather like in London?"
-    print(f"User: {query1}")
-    run1 = agent.invoke(query=query1, session_id=session_id)
-    final_state1 = run1.get_final_state()
-    response1 = final_state1["messages"][-1].content
-    print(f"Bot: {response1}")
-    print(f"Messages in session: {len(final_state1['messages'])}")
-
-    # Query 2: Exchange Rate
-    print("\n--- Query 2: Currency Exchange ---")
-    query2 = "What's the exchange rate from USD to EUR?"
-    print(f"User: {query2}")
-    run2 = agent.invoke(query=query2, session_id=session_id)
-    final_state2 = run2.get_final_state()
-    response2 = final_state2["messages"][-1].content
-    print(f"Bot: {response2}")
-    print(f"Messages in session: {len(final_state2['messages'])}")
-
-    # Query 3: Random Pokemon
-    print("\n--- Query 3: Random Pokemon ---")
-    query3 = "Pick one random Pokemon!"
-    print(f"User: {query3}")
-    run3 = agent.invoke(query=query3, session_id=session_id)
-    final_state3 = run3.get_final_state()
-    response3 = final_state3["messages"][-1].content
-    print(f"Bot: {response3}")
-    print(f"Messages in session: {len(final_state3['messages'])}")
+    # The three queries are independent, so each gets its own session and
+    # they run concurrently; total latency is the slowest query, not the sum.
+    queries = [
+        ("Weather Information", "What's the weather like in London?", "external_api_demo_weather"),
+        ("Currency Exchange", "What's the exchange rate from USD to EUR?", "external_api_demo_exchange"),
+        ("Random Pokemon", "Pick one random Pokemon!", "external_api_demo_pokemon"),
+    ]
+    
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        runs = list(executor.map(
+            lambda q: agent.invoke(query=q[1], session_id=q[2]),
+            queries
+        ))
+    
+    for i, ((title, query, _), run) in enumerate(zip(queries, runs), 1):
+        print(f"\n--- Query {i}: {title} ---")
+        print(f"User: {query}")
+        final_state = run.get_final_state()
+        response = final_state["messages"][-1].content
+        print(f"Bot: {response}")
+        print(f"Messages in session: {len(final_state['messages'])}")
 
     # Summary
     print("\n" + "=" * 60)
     print("Session Summary")
     print("=" * 60)
-    runs = agent.get_session_runs(session_id)
-    print(f"Total runs in session '{session_id}': {len(runs)}")
-    for i, run_object in enumerate(runs, 1):
-        metadata = run_object.metadata
-        print(f"\nRun {i}:")
-        print(f"  Run ID: {metadata.get('run_id', 'N/A')[:8]}...")
-        print(f"  Start: {metadata.get('start_timestamp', 'N/A')}")
-        print(f"  Messages: {metadata.get('snapshot_counts', 0)}")
+    for _, _, session_id in queries:
+        session_runs = agent.get_session_runs(session_id)
+        print(f"\nTotal runs in session '{session_id}': {len(session_runs)}")
+        for i, run_object in enumerate(session_runs, 1):
+            metadata = run_object.metadata
+            print(f"\nRun {i}:")
+            print(f"  Run ID: {metadata.get('run_id', 'N/A')[:8]}...")
+            print(f"  Start: {metadata.get('start_timestamp', 'N/A')}")
+            print(f"  Messages: {metadata.get('snapshot_counts', 0)}")
     print()
 
 
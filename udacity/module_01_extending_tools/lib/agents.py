@@ -1,11 +1,102 @@
-from typing import TypedDict, List, Optional, Union, TypeVar
-import json
+from typing import Any, Callable, Dict, TypedDict, List, Optional, Union, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from lib.state_machine import StateMachine, Step, EntryPoint, Termination, Run
 from lib.llm import LLM
 from lib.messages import AIMessage, UserMessage, SystemMessage, ToolMessage
 from lib.tooling import Tool, ToolCall
 from lib.memory import ShortTermMemory
+from lib.jsonutil import json_loads, json_dumps
+
+
+# Upper bound on tool calls from a single model turn that run at the same time
+MAX_TOOL_WORKERS = 8
+
+# Turns a tool and the raw JSON arguments of a call to it into keyword arguments;
+# raises ValueError (or a subclass, e.g. pydantic's ValidationError) if they're invalid
+ArgumentParser = Callable[[Tool, str], Dict[str, Any]]
+
+
+def parse_json_arguments(tool: Tool, arguments: str) -> Dict[str, Any]:
+    """Default ArgumentParser: decode the arguments as JSON, without validation"""
+    return json_loads(arguments)
+
+
+def route_on_tool_calls(state: dict, tool_executor: Step, termination: Step) -> Step:
+    """Transition logic: Run the tools if the LLM asked for any, otherwise finish
+    
+    Bind the steps with functools.partial to use it as a StateMachine condition.
+    """
+    if state.get("current_tool_calls"):
+        return tool_executor
+    return termination
+
+
+def run_tool_call(tools_map: Dict[str, Tool], call: ToolCall,
+                  parse_arguments: ArgumentParser = parse_json_arguments) -> Optional[ToolMessage]:
+    """Execute a single tool call, returning None if no tool matches its name"""
+    function_name = call.function.name
+    # Efficient tool lookup using dictionary
+    tool = tools_map.get(function_name)
+    if tool is None:
+        return None
+    try:
+        function_args = parse_arguments(tool, call.function.arguments)
+    except ValueError as e:
+        # Report the bad call back to the model instead of aborting the step;
+        # every tool call still needs a matching tool message
+        print(f"[Agent] Malformed arguments for {function_name}: {e}")
+        result = f"Error: invalid arguments: {e}"
+    else:
+        result = tool(**function_args)
+    return ToolMessage(
+        content=json_dumps(result), 
+        tool_call_id=call.id, 
+        name=function_name, 
+    )
+
+
+def run_tool_calls(tools_map: Dict[str, Tool], tool_calls: List[ToolCall],
+                   parse_arguments: ArgumentParser = parse_json_arguments) -> List[ToolMessage]:
+    """Execute the tool calls from one model turn, returning their tool messages in call order
+    
+    Identical calls (same tool, same raw arguments) to a tool marked pure run only
+    once, but each still gets its own tool message; calls to any other tool always
+    run. Calls naming an unknown tool get no message.
+    """
+    def call_key(call: ToolCall):
+        tool = tools_map.get(call.function.name)
+        if tool is not None and tool.pure:
+            return (call.function.name, call.function.arguments)
+        return call.id
+    
+    unique_calls = {}
+    for call in tool_calls:
+        unique_calls.setdefault(call_key(call), call)
+    calls = list(unique_calls.values())
+    
+    # Calls from one model turn are independent; run them concurrently (up to
+    # MAX_TOOL_WORKERS at a time) so the turn costs the slowest tool rather
+    # than the sum. map() keeps call order.
+    run = partial(run_tool_call, tools_map, parse_arguments=parse_arguments)
+    if len(calls) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(calls), MAX_TOOL_WORKERS)) as executor:
+            results = list(executor.map(run, calls))
+    else:
+        results = [run(call) for call in calls]
+    messages_by_key = dict(zip(unique_calls, results))
+    
+    tool_messages = []
+    for call in tool_calls:
+        message = messages_by_key[call_key(call)]
+        if message is None:
+            continue
+        if message.tool_call_id != call.id:
+            message = message.model_copy(update={"tool_call_id": call.id})
+        tool_messages.append(message)
+    return tool_messages
+
 
 # Define the state schema
 class AgentState(TypedDict):
@@ -30,10 +121,20 @@ class Agent:
             temperature: Temperature parameter for LLM (default: 0.7)
         """
         self.instructions = instructions
+        # Every new session starts from the same system message
+        self._system_message = SystemMessage(content=instructions)
         self.tools = tools if tools else []
+        self.tools_map = {tool.name: tool for tool in self.tools}
         self.model_name = model_name
         self.temperature = temperature
         
+        # One LLM client (and tool schema registry) shared by every step and session
+        self.llm = LLM(
+            model=self.model_name,
+            temperature=self.temperature,
+            tools=self.tools
+        )
+        
         # Initialize memory and state machine
         self.memory = ShortTermMemory()
         self.workflow = self._create_state_machine()
@@ -44,7 +145,10 @@ class Agent:
         
         # If no messages exist, start with system message
         if not messages:
-            messages = [SystemMessage(content=state["instructions"])]
+            if state["instructions"] == self.instructions:
+                messages = [self._system_message]
+            else:
+                messages = [SystemMessage(content=state["instructions"])]
             
         # Add the new user message
         messages.append(UserMessage(content=state["user_query"]))
@@ -56,49 +160,31 @@ class Agent:
 
     def _llm_step(self, state: AgentState) -> AgentState:
         """Step logic: Process the current state through the LLM"""
-        # Initialize LLM
-        llm = LLM(
-            model=self.model_name,
-            temperature=self.temperature,
-            tools=self.tools
-        )
-
-        response = llm.invoke(state["messages"])
+        response = self.llm.invoke(state["messages"])
         tool_calls = response.tool_calls if response.tool_calls else None
 
         # Create AI message with content and tool calls
         ai_message = AIMessage(content=response.content, tool_calls=tool_calls)
         
+        # Append in place: each run owns its list and snapshots hold their own copy
+        messages = state["messages"]
+        messages.append(ai_message)
+        
         return {
-            "messages": state["messages"] + [ai_message],
+            "messages": messages,
             "current_tool_calls": tool_calls,
             "session_id": state["session_id"]
         }
 
     def _tool_step(self, state: AgentState) -> AgentState:
         """Step logic: Execute any pending tool calls"""
-        tool_calls = state["current_tool_calls"] or []
-        tool_messages = []
-        
-        for call in tool_calls:
-            # Access tool call data correctly
-            function_name = call.function.name
-            function_args = json.loads(call.function.arguments)
-            tool_call_id = call.id
-            # Find the matching tool
-            tool = next((t for t in self.tools if t.name == function_name), None)
-            if tool:
-                result = str(tool(**function_args))
-                tool_message = ToolMessage(
-                    content=json.dumps(result), 
-                    tool_call_id=tool_call_id, 
-                    name=function_name, 
-                )
-                tool_messages.append(tool_message)
+        tool_messages = run_tool_calls(self.tools_map, state["current_tool_calls"] or [])
         
         # Clear tool calls and add results to messages
+        messages = state["messages"]
+        messages.extend(tool_messages)
         return {
-            "messages": state["messages"] + tool_messages,
+            "messages": messages,
             "current_tool_calls": None,
             "session_id": state["session_id"]
         }
@@ -121,13 +207,11 @@ class Agent:
         machine.connect(message_prep, llm_processor)
         
         # Transition based on whether there are tool calls
-        def check_tool_calls(state: AgentState) -> Union[Step[AgentState], str]:
-            """Transition logic: Check if there are tool calls"""
-            if state.get("current_tool_calls"):
-                return tool_executor
-            return termination
-        
-        machine.connect(llm_processor, [tool_executor, termination], check_tool_calls)
+        machine.connect(
+            llm_processor,
+            [tool_executor, termination],
+            partial(route_on_tool_calls, tool_executor=tool_executor, termination=termination),
+        )
         machine.connect(tool_executor, llm_processor)  # Go back to llm after tool execution
         
         return machine
@@ -4,6 +4,23 @@ import uuid
 from collections.abc import MutableSequence
 
 
+def dedupe_texts(texts: List[str]) -> List[str]:
+    """
+    Drop repeated texts, keeping the first occurrence and the original order.
+    
+    Only exact duplicates are dropped; texts that merely share a prefix (e.g.
+    chunks starting with the same running header) are all kept. Used to avoid
+    paying for the same retrieved context twice.
+    """
+    seen = set()
+    unique = []
+    for text in texts:
+        if text not in seen:
+            seen.add(text)
+            unique.append(text)
+    return unique
+
+
 @dataclass
 class Document:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
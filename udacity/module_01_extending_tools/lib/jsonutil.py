@@ -0,0 +1,26 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+
+def json_loads(content: Union[str, bytes]) -> Any:
+    """Parse JSON text, with orjson when available (its decode error subclasses json's)"""
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize to a JSON string, with orjson when available
+    
+    Values orjson rejects (ints beyond 64 bits, non-string dict keys) go through
+    the stdlib encoder instead, which writes anything it can't encode with str().
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:  # orjson.JSONEncodeError subclasses TypeError
+            pass
+    return json.dumps(obj, default=str)
@@ -23,9 +23,17 @@ class LLM:
         self.tools: Dict[str, Tool] = {
             tool.name: tool for tool in (tools or [])
         }
+        # OpenAI schemas of the tools, built once and reused by every request
+        self._tool_schemas: Optional[List[Dict[str, Any]]] = None
 
     def register_tool(self, tool: Tool):
         self.tools[tool.name] = tool
+        self._tool_schemas = None
+
+    def _get_tool_schemas(self) -> List[Dict[str, Any]]:
+        if self._tool_schemas is None:
+            self._tool_schemas = [tool.dict() for tool in self.tools.values()]
+        return self._tool_schemas
 
     def _build_payload(self, messages: List[BaseMessage]) -> Dict[str, Any]:
         payload = {
@@ -35,7 +43,7 @@ class LLM:
         }
 
         if self.tools:
-            payload["tools"] = [tool.dict() for tool in self.tools.values()]
+            payload["tools"] = self._get_tool_schemas()
             payload["tool_choice"] = "auto"
 
         return payload
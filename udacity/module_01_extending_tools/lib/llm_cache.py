@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from lib.messages import AIMessage
+from lib.tooling import ToolCall
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentic_examples", "llm_cache.db")
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of LLM responses persisted in SQLite.
+
+    Responses survive the Python process, so rerunning a demo with the same
+    prompts reads them back from disk instead of calling the LLM again. It is
+    used like the dict it replaces: `cache.get(key)` and `cache[key] = message`.
+
+    When the table grows past `max_entries`, the least-hit (then oldest)
+    entries are evicted, never the one just written.
+
+    Example:
+        >>> cache = LLMResponseCache()
+        >>> cache[key] = AIMessage(content="42")
+        >>> cache.get(key).content
+        '42'
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 10_000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by every thread; writes are serialised by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, content TEXT, tool_calls TEXT, "
+                "created REAL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content, tool_calls FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE llm_cache SET hits = hits + 1 WHERE key = ?", (key,))
+        content, tool_calls = row
+        return AIMessage(
+            content=content,
+            tool_calls=[ToolCall.model_validate(call) for call in json.loads(tool_calls)] or None,
+        )
+
+    def __setitem__(self, key: str, message: AIMessage):
+        tool_calls = json.dumps([call.model_dump() for call in message.tool_calls or []])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, tool_calls, created) VALUES (?, ?, ?, ?)",
+                (key, message.content, tool_calls, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache WHERE key != ? "
+                "ORDER BY hits DESC, created DESC LIMIT -1 OFFSET ?)",
+                (key, self.max_entries - 1),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self):
+        self._conn.close()
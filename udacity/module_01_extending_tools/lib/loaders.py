@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 import pdfplumber
 from lib.documents import Corpus, Document
 
@@ -27,17 +27,16 @@ class PDFLoader:
     def __init__(self, pdf_path:str):
         self.pdf_path = pdf_path
 
-    def load(self) -> Document:
-        corpus = Corpus()
-
+    def lazy_load(self) -> Iterator[Document]:
+        """Yield one Document per non-empty page as each page is parsed"""
         with pdfplumber.open(self.pdf_path) as pdf:
             for num, page in enumerate(pdf.pages, start=1):
                 text = page.extract_text()
                 if text:
-                    corpus.append(
-                        Document(
-                            id=str(num),
-                            content=text
-                        )
+                    yield Document(
+                        id=str(num),
+                        content=text
                     )
-        return corpus
+
+    def load(self) -> Document:
+        return Corpus(list(self.lazy_load()))
@@ -1,5 +1,6 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
 from dataclasses import dataclass, field
+from collections import deque
 import copy
 
 
@@ -10,8 +11,16 @@ class SessionNotFoundError(Exception):
 
 @dataclass
 class ShortTermMemory():
-    """Manage the history of objects across multiple sessions"""
-    sessions: Dict[str, List[Any]] = field(default_factory=lambda: {})
+    """Manage the history of objects across multiple sessions
+    
+    If `max_objects` is set, each session keeps only its most recent
+    `max_objects` objects and the oldest are dropped as new ones arrive.
+    Objects added with `pinned=True` (e.g. a persona SystemMessage) are kept
+    apart from that window, never dropped, and always returned first.
+    """
+    sessions: Dict[str, Deque[Any]] = field(default_factory=lambda: {})
+    max_objects: Optional[int] = None
+    pinned: Dict[str, List[Any]] = field(default_factory=lambda: {})
 
     def __post_init__(self):
         """Initialize the default session"""
@@ -35,9 +44,14 @@ class ShortTermMemory():
         """
         if session_id in self.sessions:
             return False
-        self.sessions[session_id] = []
+        self.sessions[session_id] = self._new_history()
+        self.pinned[session_id] = []
         return True
 
+    def _new_history(self) -> Deque[Any]:
+        """Create an empty object history, bounded by `max_objects` if set"""
+        return deque(maxlen=self.max_objects)
+
     def delete_session(self, session_id: str) -> bool:
         """Delete a session
         
@@ -55,6 +69,7 @@ class ShortTermMemory():
         if session_id not in self.sessions:
             return False
         del self.sessions[session_id]
+        self.pinned.pop(session_id, None)
         return True
 
     def _validate_session(self, session_id: str):
@@ -69,19 +84,22 @@ class ShortTermMemory():
         if session_id not in self.sessions:
             raise SessionNotFoundError(f"Session '{session_id}' not found")
 
-    def add(self, object: Any, session_id: Optional[str] = None):
+    def add(self, object: Any, session_id: Optional[str] = None, pinned: bool = False):
         """Add a new object to the history
         
         Args:
             object: Object to add to history
             session_id: Optional session ID to add to (uses default if None)
+            pinned: If True, keep the object for the life of the session instead
+                of in the bounded history window
             
         Raises:
             SessionNotFoundError: If specified session doesn't exist
         """
         session_id = session_id or "default"
         self._validate_session(session_id)
-        self.sessions[session_id].append(copy.deepcopy(object))
+        target = self.pinned[session_id] if pinned else self.sessions[session_id]
+        target.append(copy.deepcopy(object))
 
     def get_all_objects(self, session_id: Optional[str] = None) -> List[Any]:
         """Get all objects for a session
@@ -97,7 +115,7 @@ class ShortTermMemory():
         """
         session_id = session_id or "default"
         self._validate_session(session_id)
-        return [copy.deepcopy(obj) for obj in self.sessions[session_id]]
+        return [copy.deepcopy(obj) for obj in (*self.pinned[session_id], *self.sessions[session_id])]
 
     def get_last_object(self, session_id: Optional[str] = None) -> Optional[Any]:
         """Get the most recent object for a session
@@ -111,8 +129,12 @@ class ShortTermMemory():
         Raises:
             SessionNotFoundError: If specified session doesn't exist
         """
-        objects = self.get_all_objects(session_id)
-        return objects[-1] if objects else None
+        session_id = session_id or "default"
+        self._validate_session(session_id)
+        # Copy only the last object; copying the whole session would make every
+        # turn's lookup cost grow with the length of the session
+        objects = self.sessions[session_id] or self.pinned[session_id]
+        return copy.deepcopy(objects[-1]) if objects else None
 
     def get_all_sessions(self) -> List[str]:
         """Get all session IDs"""
@@ -128,15 +150,17 @@ class ShortTermMemory():
             SessionNotFoundError: If specified session doesn't exist
         """
         if session_id is None:
-            # Reset all sessions to empty lists
+            # Reset all sessions to empty histories
             for sid in self.sessions:
-                self.sessions[sid] = []
+                self.sessions[sid] = self._new_history()
+                self.pinned[sid] = []
         else:
             self._validate_session(session_id)
-            self.sessions[session_id] = []
+            self.sessions[session_id] = self._new_history()
+            self.pinned[session_id] = []
 
     def pop(self, session_id: Optional[str] = None) -> Optional[Any]:
-        """Remove and return the last object from a session
+        """Remove and return the last (unpinned) object from a session
         
         Args:
             session_id: Optional session ID to pop from (uses default if None)
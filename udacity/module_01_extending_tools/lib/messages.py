@@ -1,13 +1,20 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, Union, List, Dict, Any, Literal
 
 
 class BaseMessage(BaseModel):
+    # Messages are immutable, so state snapshots and memory copies can share
+    # them instead of deep-copying the whole conversation every step
+    model_config = ConfigDict(frozen=True)
+
     content: Optional[str] = ""
 
     def dict(self) -> Dict:
         return dict(self)
 
+    def __deepcopy__(self, memo: Optional[Dict] = None) -> "BaseMessage":
+        return self
+
 
 class SystemMessage(BaseMessage):
     role: Literal["system"] = "system"
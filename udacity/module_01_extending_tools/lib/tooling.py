@@ -17,11 +17,15 @@ class Tool:
         self,
         func: Callable,
         name: Optional[str] = None,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        pure: bool = False
     ):
         self.func = func
         self.name = name or func.__name__
         self.description = description or inspect.getdoc(func)
+        # Pure tools (deterministic, no side effects) may share one result
+        # between identical calls
+        self.pure = pure
         self.signature = inspect.signature(func, eval_str=True)
         self.type_hints = get_type_hints(func)
 
@@ -114,12 +118,12 @@ class Tool:
 
 
 
-def tool(func=None, *, name: str = None, description: str = None):
+def tool(func=None, *, name: str = None, description: str = None, pure: bool = False):
     def wrapper(f):
         @wraps(f)
         def wrapped(*args, **kwargs):
             return f(*args, **kwargs)
-        return Tool(f, name=name, description=description)
+        return Tool(f, name=name, description=description, pure=pure)
     
     # @tool ou @tool(name="foo")
     return wrapper(func) if func else wrapper
\ No newline at end of file
@@ -1,3 +1,6 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Optional, Dict, Any, Union
 from typing_extensions import TypedDict
 import chromadb
@@ -9,6 +12,32 @@ from lib.loaders import PDFLoader
 from lib.documents import Document, Corpus
 
 
+@lru_cache(maxsize=None)
+def _openai_embedding_function(api_key: str) -> EmbeddingFunction:
+    """
+    Build the OpenAI embedding function for an API key once per process.
+    
+    Every VectorStoreManager (and so every store) using the same key shares
+    one embedding function, and with it one OpenAI client and HTTP connection
+    pool, instead of paying a fresh client setup and TLS handshake each time.
+    """
+    return embedding_functions.OpenAIEmbeddingFunction(
+        api_key=api_key
+    )
+
+
+# Chroma indexes every collection with HNSW (approximate nearest neighbour), so
+# queries never scan all stored embeddings. These settings make that index
+# explicit: cosine space to match how results are ranked, and a wider search
+# beam than Chroma's default (10) so small `n_results` queries keep good recall.
+HNSW_SETTINGS: Dict[str, Any] = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 64,
+    "hnsw:search_ef": 64,
+}
+
+
 class VectorStore:
     """
     High-level interface for vector database operations using ChromaDB.
@@ -28,7 +57,8 @@ class VectorStore:
     def __init__(self, chroma_collection: ChromaCollection):
         self._collection = chroma_collection
 
-    def add(self, item: Union[Document, Corpus, List[Document]]):
+    def add(self, item: Union[Document, Corpus, List[Document]],
+            embeddings: Optional[List[List[float]]] = None):
         """
         Add documents to the vector store with automatic embedding generation.
         
@@ -39,6 +69,8 @@ class VectorStore:
         Args:
             item (Union[Document, Corpus, List[Document]]): Documents to add.
                 Can be a single Document, a Corpus collection, or a list of Documents.
+            embeddings (Optional[List[List[float]]]): Precomputed embeddings, one
+                per document in order. When given, the embedding function is skipped.
                 
         Raises:
             TypeError: If the input type is not supported or if a list contains
@@ -63,12 +95,14 @@ class VectorStore:
         self._collection.add(
             documents=item_dict["contents"],
             ids=item_dict["ids"],
-            metadatas=item_dict["metadatas"]
+            metadatas=item_dict["metadatas"],
+            embeddings=embeddings
         )
 
-    def query(self, query_texts: List[str], n_results: int = 3,
+    def query(self, query_texts: Optional[List[str]] = None, n_results: int = 3,
               where: Optional[Dict[str, Any]] = None,
-              where_document: Optional[Dict[str, Any]] = None) -> QueryResult:
+              where_document: Optional[Dict[str, Any]] = None,
+              query_embeddings: Optional[List[List[float]]] = None) -> QueryResult:
         """
         Perform semantic similarity search against stored documents.
         
@@ -83,6 +117,9 @@ class VectorStore:
                 ChromaDB query syntax (e.g., {"author": "Smith"})
             where_document (Optional[Dict[str, Any]]): Document content filter
                 conditions using ChromaDB query syntax
+            query_embeddings (Optional[List[List[float]]]): Precomputed query
+                embeddings to search with instead of `query_texts`, e.g. to reuse
+                one embedding across several stores
                 
         Returns:
             QueryResult: ChromaDB query result containing documents, distances,
@@ -99,6 +136,7 @@ class VectorStore:
         """
         return self._collection.query(
             query_texts=query_texts,
+            query_embeddings=query_embeddings,
             n_results=n_results,
             where=where,
             where_document=where_document,
@@ -150,7 +188,7 @@ class VectorStoreManager:
     Key responsibilities:
     - ChromaDB client initialization and management
     - OpenAI embedding function configuration
-    - Vector store creation with consistent settings
+    - Vector store creation with consistent settings (including HNSW index parameters)
     - Store lifecycle management (create, get, delete)
     """
 
@@ -159,10 +197,7 @@ class VectorStoreManager:
         self.embedding_function = self._create_embedding_function(openai_api_key)
 
     def _create_embedding_function(self, api_key: str) -> EmbeddingFunction:
-        embeddings_fn = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=api_key
-        )
-        return embeddings_fn
+        return _openai_embedding_function(api_key)
 
     def __repr__(self):
         return f"VectorStoreManager():{self.chroma_client}"
@@ -181,7 +216,8 @@ class VectorStoreManager:
         try:
             chroma_collection = self.chroma_client.create_collection(
                 name=store_name,
-                embedding_function=self.embedding_function
+                embedding_function=self.embedding_function,
+                metadata=HNSW_SETTINGS
             )
         except Exception as e:
             print(f"Pass `force=True` or use `get_or_create_store` method")
@@ -191,7 +227,8 @@ class VectorStoreManager:
     def get_or_create_store(self, store_name: str) -> VectorStore:
         chroma_collection = self.chroma_client.get_or_create_collection(
             name=store_name,
-            embedding_function=self.embedding_function
+            embedding_function=self.embedding_function,
+            metadata=HNSW_SETTINGS
         )
         return VectorStore(chroma_collection)
 
@@ -215,10 +252,24 @@ class CorpusLoaderService:
     - Vector store creation and management
     - Batch document insertion
     - Progress reporting and error handling
+    
+    Documents are added `embed_batch_size` at a time. Each batch is embedded
+    with a single embeddings API request, which keeps large PDFs within the
+    provider's per-request input and token limits without falling back to
+    one request per page. Up to `max_concurrent_batches` of those requests
+    are in flight at once, since embedding is dominated by network wait, and
+    the PDF keeps being parsed while they are.
     """
 
-    def __init__(self, vector_store_manager: VectorStoreManager):
+    def __init__(self, vector_store_manager: VectorStoreManager, embed_batch_size: int = 64,
+                 max_concurrent_batches: int = 4):
+        if embed_batch_size < 1:
+            raise ValueError("embed_batch_size must be at least 1.")
+        if max_concurrent_batches < 1:
+            raise ValueError("max_concurrent_batches must be at least 1.")
         self.manager = vector_store_manager
+        self.embed_batch_size = embed_batch_size
+        self.max_concurrent_batches = max_concurrent_batches
 
     def load_pdf(self, store_name: str, pdf_path: str) -> VectorStore:
         """
@@ -245,8 +296,32 @@ class CorpusLoaderService:
         print(f"VectorStore `{store_name}` ready!")
 
         loader = PDFLoader(pdf_path)
-        document = loader.load()
-        store.add(document)
+        embed = self.manager.embedding_function
+        # Each full batch of parsed pages is sent for embedding while parsing carries
+        # on. Batches are added to the store oldest first, so pages keep their order,
+        # and parsing waits once `max_concurrent_batches` requests are in flight.
+        pending = deque()
+
+        def add_oldest():
+            batch, future = pending.popleft()
+            store.add(batch, embeddings=future.result())
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_batches) as executor:
+            def submit(batch: List[Document]):
+                pending.append((batch, executor.submit(embed, [doc.content for doc in batch])))
+                if len(pending) >= self.max_concurrent_batches:
+                    add_oldest()
+
+            batch = []
+            for doc in loader.lazy_load():
+                batch.append(doc)
+                if len(batch) == self.embed_batch_size:
+                    submit(batch)
+                    batch = []
+            if batch:
+                submit(batch)
+            while pending:
+                add_oldest()
         print(f"Pages from `{pdf_path}` added!")
 
         return store
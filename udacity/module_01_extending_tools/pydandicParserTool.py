@@ -1,6 +1,6 @@
 from typing import List, Any, Annotated, Optional
 from datetime import date
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from lib.messages import UserMessage, SystemMessage
 from lib.tooling import tool
 from lib.llm import LLM
@@ -10,11 +10,18 @@ from lib.parsers import (
     PydanticOutputParser, 
     ToolOutputParser,
 )
+from lib.jsonutil import json_loads, json_dumps
 from dotenv import load_dotenv
+from functools import lru_cache
 import json
+import re
 
 load_dotenv()
 
+# A reply wrapped in a markdown code fence, optionally tagged as json
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
 chat_model = LLM()
 
 messages = [
@@ -49,6 +56,11 @@ class MeetingSummary(BaseModel):
     key_points: Annotated[list[str], Field(description="Key discussion points from the meeting")]
     action_items: Annotated[list[ActionItem], Field(description="List of action items with details")]       
 
+@lru_cache(maxsize=None)
+def _output_schema_json(output_model: type[BaseModel]) -> str:
+    """JSON schema of an output model, generated and serialized once per model class"""
+    return json_dumps(output_model.model_json_schema())
+
 #Create a new class, `StructuredAgent`, that extends the functionality of the existing Agent class. This class will utilize the defined Pydantic models for structured outputs:
 
 class StructuredAgent:
@@ -69,39 +81,49 @@ class StructuredAgent:
         self.output_model = output_model
         load_dotenv()
         self.llm = LLM(model=model, temperature=temperature, tools=tools)
+        # The system prompt only depends on constructor arguments, so build it once
+        self._system_content = f"You're an AI Agent and your role is {self.role}. Your instructions: {self.instructions}"
+        if self.output_model:
+            self._system_content += f"\n\nReturn your response as a JSON object matching this schema: {_output_schema_json(self.output_model)}. Return ONLY the JSON object, no other text."
 
     def invoke(self, user_message: str) -> dict:
         if self.output_model:
-            # Get the schema of the output model to include in the prompt
-            schema = self.output_model.model_json_schema()
-            system_content = f"You're an AI Agent and your role is {self.role}. Your instructions: {self.instructions}\n\nReturn your response as a JSON object matching this schema: {json.dumps(schema)}. Return ONLY the JSON object, no other text."
-            messages = [SystemMessage(content=system_content)]
+            messages = [SystemMessage(content=self._system_content)]
             messages.append(UserMessage(content=user_message))
             ai_message = self.llm.invoke(messages)
-            print("Content:", ai_message.content)  # Debug print
-            # Clean the response - remove markdown code blocks if present
             content = ai_message.content
-            if content.startswith("```"):
-                # Remove markdown code blocks
-                content = content.strip()
-                if content.startswith("```json"):
-                    content = content[7:]  # Remove ```json
-                elif content.startswith("```"):
-                    content = content[3:]  # Remove ```
-                if content.endswith("```"):
-                    content = content[:-3]  # Remove trailing ```
-                content = content.strip()
-            print("Cleaned Content:", content)  # Debug print
-            parser = JsonOutputParser()
-            # Parse using the cleaned content
-            ai_message.content = content
-            return parser.parse(ai_message)
+            # Well-behaved replies are plain JSON; only strip a markdown fence if that fails
+            try:
+                return json_loads(content)
+            except json.JSONDecodeError:
+                pass
+            match = _JSON_FENCE_RE.match(content)
+            if match:
+                content = match.group(1)
+            return json_loads(content)
         else:
-            messages = [SystemMessage(content=f"You're an AI Agent and your role is {self.role}. Your instructions: {self.instructions}")]
+            messages = [SystemMessage(content=self._system_content)]
             messages.append(UserMessage(content=user_message))
             ai_message = self.llm.invoke(messages)
             return {"response": ai_message.content}
 
+    def invoke_model(self, user_message: str) -> BaseModel:
+        """Invoke the agent and validate the JSON reply straight into `output_model`.
+
+        pydantic-core parses and validates the raw JSON text in one pass, so no
+        intermediate dict is built and then re-walked by `Model(**data)`.
+        """
+        messages = [SystemMessage(content=self._system_content)]
+        messages.append(UserMessage(content=user_message))
+        content = self.llm.invoke(messages).content
+        try:
+            return self.output_model.model_validate_json(content)
+        except ValidationError:
+            match = _JSON_FENCE_RE.match(content)
+            if not match:
+                raise
+            return self.output_model.model_validate_json(match.group(1))
+
 
 def main():
     # print("=" * 60)
@@ -170,10 +192,9 @@ def main():
         * Mike will prepare the risk assessment document by end of month
     """
 
-    summary = meeting_agent.invoke(meeting_transcript)
-    print(json.dumps(summary, indent=2))
+    validated_summary = meeting_agent.invoke_model(meeting_transcript)
+    print(validated_summary.model_dump_json(indent=2))
 
-    validated_summary = MeetingSummary(**summary)
     print("Meeting Title:", validated_summary.title)
     print("\nParticipants:")
     for participant in validated_summary.participants:
@@ -11,16 +11,25 @@ if importlib.util.find_spec("pysqlite3") is not None:
         print(f"Warning: Could not load pysqlite3: {e}")
 
 import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 import chromadb
 from chromadb.api.models.Collection import Collection
 from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
-from typing import List, TypedDict
+from typing import List, Tuple, TypedDict
 import pdfplumber
 
-from lib.state_machine import StateMachine, Step, EntryPoint, Termination, Resource
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; chunks fall back to whitespace-delimited words
+    tiktoken = None
+
+from lib.state_machine import StateMachine, Step, EntryPoint, Termination
 from lib.llm import LLM
 from lib.messages import BaseMessage, UserMessage, SystemMessage
+from lib.documents import dedupe_texts
 
 import logging
 logging.getLogger('pdfminer').setLevel(logging.ERROR)
@@ -46,6 +55,53 @@ DOCUMENT_IDS = ["id1", "id2", "id3", "id4", "id5"]
 # PDF file path for RAG demo
 PDF_FILE_PATH = "GlobalEVOutlook2025.pdf"
 
+# Pages extracted per worker task
+PDF_BATCH_SIZE = 32
+
+# Page text is split into overlapping windows of this many tokens before embedding
+CHUNK_TOKENS = 500
+CHUNK_OVERLAP_TOKENS = 50
+
+# Chunks per collection.add call (and so per embeddings API request)
+EMBED_BATCH_SIZE = 100
+
+# On-disk ChromaDB store, so embedded collections survive between runs
+CHROMA_CACHE_DIR = ".chroma_cache"
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+# ============================================================================
+# Shared Clients
+# ============================================================================
+
+# Built lazily on first use and then shared by every demo, so the Chroma client,
+# the OpenAI embedding client and the LLM's HTTP connections are set up once.
+# Lazy rather than module-level so PDF worker processes never construct them.
+
+@lru_cache(maxsize=None)
+def get_chroma_client():
+    """Process-wide persistent ChromaDB client"""
+    return chromadb.PersistentClient(path=CHROMA_CACHE_DIR)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_function(api_key: str) -> embedding_functions.OpenAIEmbeddingFunction:
+    """Shared OpenAI embedding function for an API key"""
+    return embedding_functions.OpenAIEmbeddingFunction(
+        api_key=api_key,
+        model_name=EMBEDDING_MODEL
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm() -> LLM:
+    """Shared chat model used to generate RAG answers"""
+    return LLM(
+        model="gpt-4o-mini",
+        temperature=0.3,
+    )
+
 
 # ============================================================================
 # ChromaDB RAG Demo
@@ -63,10 +119,15 @@ def demo_chromadb_basics():
     print("=" * 60)
 
     print("\n--- Step 1: Initialize ChromaDB Client ---")
-    chroma_client = chromadb.Client()
+    chroma_client = get_chroma_client()
     print("ChromaDB client initialized")
 
     print("\n--- Step 2: Create Collection ---")
+    # Default (local) embeddings are cheap, so this collection is rebuilt each run
+    try:
+        chroma_client.delete_collection(name="demo")
+    except Exception:
+        pass
     collection = chroma_client.create_collection(name="demo")
     print(f"Collection 'demo' created")
 
@@ -79,7 +140,7 @@ def demo_chromadb_basics():
     print(f"Total documents in collection: {count}")
 
     print("\n--- Step 5: Peek at First Document ---")
-    peek_result = collection.peek(1)
+    peek_result = collection.get(limit=1, include=['documents', 'embeddings'])
     print(f"First document ID: {peek_result['ids'][0]}")
     print(f"First document text: {peek_result['documents'][0][:80]}...")
 
@@ -87,7 +148,7 @@ def demo_chromadb_basics():
     result = collection.query(
         query_texts=["gadget"],
         n_results=2,
-        include=['metadatas', 'documents', 'distances']
+        include=['documents', 'distances']
     )
     
     print(f"\nQuery: 'gadget'")
@@ -102,8 +163,8 @@ def demo_chromadb_basics():
     print(f"Embedding function: {embedding_function_name}")
 
     print("\n--- Step 8: Check Embedding Dimensions ---")
-    size = len(collection.peek(1)['embeddings'][0])
-    print(f"Embedding dimensions: {size}")
+    # Measured on the stored vector peeked in step 5
+    print(f"Embedding dimensions: {len(peek_result['embeddings'][0])}")
     
     print("\n" + "=" * 60)
     print("Demo completed successfully")
@@ -125,50 +186,42 @@ def demo_openai_embeddings():
     print("Demo 2: ChromaDB with OpenAI Embeddings")
     print("=" * 60)
     
-    print("\n--- Step 1: Initialize ChromaDB Client ---")
-    chroma_client = chromadb.Client()
-    print("ChromaDB client initialized")
-    
-    # Clean up existing collection if it exists
-    print("\n--- Step 2: Clean Up Previous Collection ---")
-    try:
-        chroma_client.delete_collection(name="demo_openai")
-        print("Deleted existing 'demo_openai' collection")
-    except Exception:
-        print("No existing collection to delete")
+    print("\n--- Step 1: Initialize Persistent ChromaDB Client ---")
+    chroma_client = get_chroma_client()
+    print(f"ChromaDB client initialized (cache: {CHROMA_CACHE_DIR})")
 
-    print("\n--- Step 3: Create OpenAI Embedding Function ---")
+    print("\n--- Step 2: Create OpenAI Embedding Function ---")
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("ERROR: OPENAI_API_KEY not found in environment")
         print("Skipping OpenAI embeddings demo")
         return
     
-    embeddings_fn = embedding_functions.OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small"
-    )
+    embeddings_fn = get_embedding_function(api_key)
     print("OpenAI embedding function created")
 
-    print("\n--- Step 4: Create Collection with OpenAI Embeddings ---")
-    collection = chroma_client.create_collection(
+    print("\n--- Step 3: Open Collection with OpenAI Embeddings ---")
+    collection = chroma_client.get_or_create_collection(
         name="demo_openai",
         embedding_function=embeddings_fn
     )
-    print("Collection 'demo_openai' created with OpenAI embeddings")
-
-    print("\n--- Step 5: Add Documents to Collection ---")
-    collection.add(
-        documents=SENTENCE_LIST,
-        ids=DOCUMENT_IDS
-    )
-    print(f"Added {len(SENTENCE_LIST)} documents to collection")
+    print("Collection 'demo_openai' ready with OpenAI embeddings")
+
+    print("\n--- Step 4: Add Documents to Collection ---")
+    if collection.count() == len(SENTENCE_LIST):
+        print(f"Reusing {len(SENTENCE_LIST)} cached documents (no embedding calls)")
+    else:
+        collection.upsert(
+            documents=SENTENCE_LIST,
+            ids=DOCUMENT_IDS
+        )
+        print(f"Added {len(SENTENCE_LIST)} documents to collection")
 
-    print("\n--- Step 6: Query Collection (Search for 'gadget') ---")
+    print("\n--- Step 5: Query Collection (Search for 'gadget') ---")
     result = collection.query(
         query_texts=["gadget"],
         n_results=2,
-        include=['metadatas', 'documents', 'distances']
+        include=['documents', 'distances']
     )
     
     print(f"\nQuery: 'gadget'")
@@ -178,14 +231,14 @@ def demo_openai_embeddings():
         print(f"    Document: {doc}")
         print(f"    Distance: {distance:.4f}")
 
-    print("\n--- Step 7: Check Embedding Function ---")
+    print("\n--- Step 6: Check Embedding Function ---")
     embedding_function_name = collection._embedding_function.__class__.__name__
     print(f"Embedding function: {embedding_function_name}")
 
-    print("\n--- Step 8: Check Embedding Dimensions ---")
-    size = len(collection.peek(1)['embeddings'][0])
-    print(f"Embedding dimensions: {size}")
-    print("Note: OpenAI's text-embedding-3-small uses 1536 dimensions")
+    print("\n--- Step 7: Check Embedding Dimensions ---")
+    # Read from a stored vector rather than embedding anything new
+    stored = collection.get(limit=1, include=['embeddings'])
+    print(f"Embedding dimensions: {len(stored['embeddings'][0])}")
     
     print("\n" + "=" * 60)
     print("Demo completed successfully")
@@ -204,17 +257,31 @@ class State(TypedDict):
     answer: str
 
     
-def retrieve(state:State, resource:Resource):
-    question = state["question"]
-    collection:Collection = resource.vars.get("collection")
-    results = collection.query(
-        query_texts=[question],
-        n_results=3,
-        include=['documents']
-    )
-    retrieved_docs = results['documents'][0]
-    
-    return {"documents": retrieved_docs}
+# Steps that need the collection or LLM are built as closures over them when the
+# workflow is wired, so each run reads a local instead of looking it up in a Resource.
+
+def make_retrieve(collection:Collection):
+    def retrieve(state:State):
+        question = state["question"]
+        results = collection.query(
+            query_texts=[question],
+            n_results=3,
+            include=['documents']
+        )
+        retrieved_docs = dedupe_texts(results['documents'][0])
+        
+        return {"documents": retrieved_docs}
+    return retrieve
+
+# Fixed parts of the augmented prompt, built once instead of on every run
+RAG_SYSTEM_MESSAGE = SystemMessage(content="You are an assistant for question-answering tasks.")
+RAG_USER_TEMPLATE = (
+    "Use the following pieces of retrieved context to answer the question. "
+    "If you don't know the answer, just say that you don't know. "
+    "\n# Question: \n-> {question} "
+    "\n# Context: \n-> {context} "
+    "\n# Answer: "
+)
 
 def augment(state:State):
     question = state["question"]
@@ -222,27 +289,107 @@ def augment(state:State):
     context = "\n\n".join(documents)
 
     messages = [
-        SystemMessage(content="You are an assistant for question-answering tasks."),
-        UserMessage(
-            content=(
-                "Use the following pieces of retrieved context to answer the question. "
-                "If you don't know the answer, just say that you don't know. "
-                f"\n# Question: \n-> {question} "
-                f"\n# Context: \n-> {context} "
-                "\n# Answer: "
-            )
-        )
+        RAG_SYSTEM_MESSAGE,
+        UserMessage(content=RAG_USER_TEMPLATE.format_map({"question": question, "context": context}))
     ]
 
     return {"messages": messages}
 
-def generate(state:State, resource:Resource):
-    llm:LLM = resource.vars.get("llm")
-    ai_message = llm.invoke(state["messages"])
-    return {
-        "answer": ai_message.content, 
-        "messages": state["messages"] + [ai_message],
-    }
+def make_generate(llm:LLM):
+    def generate(state:State):
+        ai_message = llm.invoke(state["messages"])
+        return {
+            "answer": ai_message.content, 
+            "messages": state["messages"] + [ai_message],
+        }
+    return generate
+
+
+@lru_cache(maxsize=None)
+def _chunk_encoding():
+    """Tokenizer of the embedding model, loaded once per process"""
+    return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+
+def split_into_chunks(text: str) -> List[str]:
+    """Split text into windows of CHUNK_TOKENS tokens that overlap by CHUNK_OVERLAP_TOKENS"""
+    step = CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS
+    if tiktoken is not None:
+        encoding = _chunk_encoding()
+        tokens = encoding.encode(text)
+        return [
+            encoding.decode(tokens[i:i + CHUNK_TOKENS])
+            for i in range(0, max(len(tokens) - CHUNK_OVERLAP_TOKENS, 1), step)
+        ]
+    words = text.split()
+    return [
+        " ".join(words[i:i + CHUNK_TOKENS])
+        for i in range(0, max(len(words) - CHUNK_OVERLAP_TOKENS, 1), step)
+    ]
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> Tuple[List[str], List[str]]:
+    """Extract and chunk the text of pages [start, stop) of a PDF.
+
+    Returns the chunk texts and their ids ("<1-based page>_<chunk index>").
+    Top-level so it can run in a worker process; each call opens the PDF once
+    for its whole range.
+    """
+    documents = []
+    chunk_ids = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for num in range(start, stop):
+            page = pdf.pages[num]
+            # Plain reading-order text is all the embedder needs; the simple extractor
+            # skips extract_text's word clustering and text-map layout reconstruction
+            text = page.extract_text_simple()
+            # Release the page's cached layout objects once its text is out
+            page.flush_cache()
+            if text:
+                for chunk_idx, chunk in enumerate(split_into_chunks(text)):
+                    documents.append(chunk)
+                    chunk_ids.append(f"{num + 1}_{chunk_idx}")
+    return documents, chunk_ids
+
+
+def _file_digest(path: str) -> str:
+    """Short SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _add_pdf_chunks(collection: Collection, pdf_path: str) -> int:
+    """Extract and chunk a PDF's pages into `collection`, returning the number of chunks added.
+
+    Layout analysis is CPU-bound and pages are independent, so batches of
+    PDF_BATCH_SIZE pages are extracted in worker processes. Their chunks are
+    added in page order, EMBED_BATCH_SIZE at a time so each embeddings request
+    carries a full batch, while later pages are still being parsed.
+    """
+    chunks_added = 0
+    pending_docs = []
+    pending_ids = []
+    with pdfplumber.open(pdf_path) as pdf:
+        print(f"Opening PDF: {pdf_path}")
+        page_count = len(pdf.pages)
+    starts = range(0, page_count, PDF_BATCH_SIZE)
+    stops = [min(start + PDF_BATCH_SIZE, page_count) for start in starts]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        batches = executor.map(partial(_extract_page_range, pdf_path), starts, stops)
+        for batch_docs, batch_ids in batches:
+            pending_docs.extend(batch_docs)
+            pending_ids.extend(batch_ids)
+            while len(pending_docs) >= EMBED_BATCH_SIZE:
+                collection.add(documents=pending_docs[:EMBED_BATCH_SIZE], ids=pending_ids[:EMBED_BATCH_SIZE])
+                chunks_added += EMBED_BATCH_SIZE
+                del pending_docs[:EMBED_BATCH_SIZE], pending_ids[:EMBED_BATCH_SIZE]
+    if pending_docs:
+        collection.add(documents=pending_docs, ids=pending_ids)
+        chunks_added += len(pending_docs)
+    return chunks_added
 
 
 def rag_demo():
@@ -269,64 +416,59 @@ def rag_demo():
         print("Skipping RAG demo")
         return
 
-    print("\n--- Step 1: Extract Text from PDF ---")
-    documents = []
-    page_nums = []
-    
-    try:
-        with pdfplumber.open(PDF_FILE_PATH) as pdf:
-            print(f"Opening PDF: {PDF_FILE_PATH}")
-            for num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text()
-                if text:
-                    documents.append(text)
-                    page_nums.append(str(num))
-        print(f"Extracted text from {len(documents)} pages")
-    except Exception as e:
-        print(f"\nERROR: Failed to extract PDF text: {e}")
-        return
-    
-    print("\n--- Step 2: Initialize ChromaDB Client ---")
-    chroma_client = chromadb.Client()
-    print("ChromaDB client initialized")
+    print("\n--- Step 1: Initialize Persistent ChromaDB Client ---")
+    chroma_client = get_chroma_client()
+    print(f"ChromaDB client initialized (cache: {CHROMA_CACHE_DIR})")
     
-    # Clean up existing collection
-    try:
-        chroma_client.delete_collection(name="traditional_rag")
-        print("Deleted existing 'traditional_rag' collection")
-    except Exception:
-        pass
-    
-    print("\n--- Step 3: Create Embedding Function ---")
-    embeddings_fn = embedding_functions.OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small"
-    )
+    print("\n--- Step 2: Create Embedding Function ---")
+    embeddings_fn = get_embedding_function(api_key)
     print("OpenAI embedding function created")
     
-    print("\n--- Step 4: Create Collection and Add Documents ---")
-    collection = chroma_client.create_collection(
-        name="traditional_rag",
+    print("\n--- Step 3: Open Collection ---")
+    # Named after the PDF's content hash and chunking settings, so an edited PDF
+    # or a different chunk size gets a fresh collection
+    collection_name = f"traditional_rag_{_file_digest(PDF_FILE_PATH)}_{CHUNK_TOKENS}_{CHUNK_OVERLAP_TOKENS}"
+    collection = chroma_client.get_or_create_collection(
+        name=collection_name,
         embedding_function=embeddings_fn
     )
-    print("Collection 'traditional_rag' created")
+    ingested_chunks = (collection.metadata or {}).get("ingested_chunks")
+    print(f"Collection '{collection_name}' ready")
     
-    collection.add(
-        documents=documents,
-        ids=page_nums
-    )
-    print(f"Added {len(documents)} document pages to collection")
+    print("\n--- Step 4: Extract and Chunk Text from PDF and Add Documents ---")
+    if ingested_chunks is not None and ingested_chunks == collection.count():
+        print(f"Reusing {ingested_chunks} cached document chunks (no parsing or embedding calls)")
+    else:
+        if collection.count():
+            # A previous run stopped part-way; start the collection over
+            chroma_client.delete_collection(name=collection_name)
+            collection = chroma_client.create_collection(
+                name=collection_name,
+                embedding_function=embeddings_fn
+            )
+        try:
+            chunks_added = _add_pdf_chunks(collection, PDF_FILE_PATH)
+        except Exception as e:
+            print(f"\nERROR: Failed to load PDF into collection: {e}")
+            return
+        # Marks the collection complete for the next run's reuse check
+        collection.modify(metadata={"ingested_chunks": chunks_added})
+        print(f"Added {chunks_added} document chunks to collection")
     
-    print("\n--- Step 5: Initialize State Machine Workflow ---")
+    print("\n--- Step 5: Initialize LLM ---")
+    llm = get_llm()
+    print("LLM initialized (gpt-4o-mini)")
+
+    print("\n--- Step 6: Initialize State Machine Workflow ---")
     workflow = StateMachine(State)
     print("State machine initialized")
 
-    print("\n--- Step 6: Configure Workflow Steps ---")
-    # Create steps
+    print("\n--- Step 7: Configure Workflow Steps ---")
+    # Create steps, binding the collection and LLM into the steps that use them
     entry = EntryPoint()
-    retrieve_step = Step("retrieve", retrieve)
+    retrieve_step = Step("retrieve", make_retrieve(collection))
     augment_step = Step("augment", augment)
-    generate_step = Step("generate", generate)
+    generate_step = Step("generate", make_generate(llm))
     termination = Termination()
             
     workflow.add_steps(
@@ -346,21 +488,6 @@ def rag_demo():
     workflow.connect(augment_step, generate_step)
     workflow.connect(generate_step, termination)
     print("Workflow transitions configured")
-
-    print("\n--- Step 7: Initialize LLM and Resources ---")
-    llm = LLM(
-        model="gpt-4o-mini",
-        temperature=0.3,
-    )
-    print("LLM initialized (gpt-4o-mini)")
-
-    resource = Resource(
-        vars={
-            "llm": llm,
-            "collection": collection,
-        }
-    )
-    print("Resource container created")
     
     print("\n--- Step 8: Execute RAG Workflow ---")
     question = "What was the number of electric car sales and their market share in Brazil in 2024?"
@@ -371,7 +498,7 @@ def rag_demo():
     }
 
     try:
-        run_object = workflow.run(initial_state, resource)
+        run_object = workflow.run(initial_state)
         final_state = run_object.get_final_state()
         answer = final_state.get("answer", "No answer generated")
         
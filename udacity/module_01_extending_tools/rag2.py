@@ -9,6 +9,8 @@ if importlib.util.find_spec("pysqlite3") is not None:
     sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List
 from dotenv import load_dotenv
 
@@ -18,6 +20,8 @@ from lib.state_machine import Run, StateMachine, Step, EntryPoint, Termination,
 from lib.messages import BaseMessage, SystemMessage, UserMessage
 from lib.tooling import tool
 from lib.vectordb import VectorStoreManager, CorpusLoaderService, VectorStore
+from chromadb.api.types import EmbeddingFunction
+from lib.documents import dedupe_texts
 
 import logging
 logging.getLogger('pdfminer').setLevel(logging.ERROR)
@@ -33,11 +37,91 @@ load_dotenv()
 electric_vehicles_vector_store: VectorStore = None
 games_market_vector_store: VectorStore = None
 rag_llm: LLM = None
+rag_embedding_function: EmbeddingFunction = None
 
 # ============================================================================
 # Tool Functions
 # ============================================================================
 
+# Fixed prompt parts, built once instead of on every tool call. The retrieved
+# context comes before the question, so queries that retrieve the same chunks
+# send an identical prompt prefix that OpenAI's automatic prompt caching can reuse.
+EV_SYSTEM_MESSAGE = SystemMessage(content="You are an assistant for question-answering tasks about electric vehicles.")
+GAMES_SYSTEM_MESSAGE = SystemMessage(content="You are an assistant for question-answering tasks about the gaming industry.")
+RAG_USER_TEMPLATE = (
+    "Use the following pieces of retrieved context to answer the question. "
+    "If you don't know the answer, just say that you don't know. "
+    "\n# Context: \n-> {context} "
+    "\n# Question: \n-> {query} "
+    "\n# Answer: "
+)
+
+def _generate_answer(vector_store: VectorStore, system_message: SystemMessage, query: str,
+                     query_embedding: List[float] = None) -> str:
+    """Retrieve context for `query` from `vector_store` and have the LLM answer from it.
+
+    If `query_embedding` is given it is used for the search, so one embedding
+    can be shared across stores instead of each store embedding the query.
+    """
+    # Query the vector store
+    if query_embedding is not None:
+        results = vector_store.query(query_embeddings=[query_embedding], n_results=3)
+    else:
+        results = vector_store.query(query_texts=[query], n_results=3)
+    if results['documents']:
+        # Canonical (page id) order rather than relevance order, so the same set of
+        # chunks always produces the same context text. Ids are page numbers, so
+        # (length, id) sorts them numerically.
+        chunks = sorted(zip(results['ids'][0], results['documents'][0]),
+                        key=lambda chunk: (len(chunk[0]), chunk[0]))
+        documents = dedupe_texts([text for _, text in chunks])
+    else:
+        documents = []
+    
+    if not documents:
+        return "No relevant information found."
+    
+    # Create context from retrieved documents
+    context = "\n\n".join(documents)
+    
+    # Use LLM to generate answer
+    messages = [
+        system_message,
+        UserMessage(content=RAG_USER_TEMPLATE.format(query=query, context=context))
+    ]
+    
+    response = rag_llm.invoke(messages)
+    return response.content
+
+
+# Answers are cached per query string: the corpora are static once loaded, and the
+# agent sometimes repeats an identical search within a session. Query embeddings
+# are cached the same way, so a query sent to several tools is embedded only once.
+# Errors propagate out of the cached functions, so they are never cached.
+# rag_demo clears all three caches whenever it (re)loads the vector stores.
+
+@lru_cache(maxsize=512)
+def _embed_query(query: str) -> List[float]:
+    return rag_embedding_function([query])[0]
+
+@lru_cache(maxsize=128)
+def _cached_ev_answer(query: str) -> str:
+    return _generate_answer(
+        electric_vehicles_vector_store,
+        EV_SYSTEM_MESSAGE,
+        query,
+        _embed_query(query),
+    )
+
+@lru_cache(maxsize=128)
+def _cached_games_answer(query: str) -> str:
+    return _generate_answer(
+        games_market_vector_store,
+        GAMES_SYSTEM_MESSAGE,
+        query,
+        _embed_query(query),
+    )
+
 @tool
 def search_global_ev_collection(query: str):
     """
@@ -61,32 +145,7 @@ def search_global_ev_collection(query: str):
         return "Error: Electric vehicles vector store not initialized"
     
     try:
-        # Query the vector store
-        results = electric_vehicles_vector_store.query(query_text=query, n_results=3)
-        documents = results['documents'][0] if results['documents'] else []
-        
-        if not documents:
-            return "No relevant information found."
-        
-        # Create context from retrieved documents
-        context = "\n\n".join(documents)
-        
-        # Use LLM to generate answer
-        messages = [
-            SystemMessage(content="You are an assistant for question-answering tasks about electric vehicles."),
-            UserMessage(
-                content=(
-                    "Use the following pieces of retrieved context to answer the question. "
-                    "If you don't know the answer, just say that you don't know. "
-                    f"\n# Question: \n-> {query} "
-                    f"\n# Context: \n-> {context} "
-                    "\n# Answer: "
-                )
-            )
-        ]
-        
-        response = rag_llm.invoke(messages)
-        return response.content
+        return _cached_ev_answer(query)
     except Exception as e:
         return f"Error searching electric vehicles collection: {str(e)}"
 
@@ -113,35 +172,45 @@ def search_games_market_report_collection(query: str):
         return "Error: Games market vector store not initialized"
     
     try:
-        # Query the vector store
-        results = games_market_vector_store.query(query_text=query, n_results=3)
-        documents = results['documents'][0] if results['documents'] else []
-        
-        if not documents:
-            return "No relevant information found."
-        
-        # Create context from retrieved documents
-        context = "\n\n".join(documents)
-        
-        # Use LLM to generate answer
-        messages = [
-            SystemMessage(content="You are an assistant for question-answering tasks about the gaming industry."),
-            UserMessage(
-                content=(
-                    "Use the following pieces of retrieved context to answer the question. "
-                    "If you don't know the answer, just say that you don't know. "
-                    f"\n# Question: \n-> {query} "
-                    f"\n# Context: \n-> {context} "
-                    "\n# Answer: "
-                )
-            )
-        ]
-        
-        response = rag_llm.invoke(messages)
-        return response.content
+        return _cached_games_answer(query)
     except Exception as e:
         return f"Error searching games market collection: {str(e)}"
 
+@tool
+def search_all_collections(query: str):
+    """
+    Search both the electric vehicles and the gaming industry knowledge bases at once.
+    
+    Use this instead of calling both search tools when a question spans both
+    topics: the query is embedded once and both collections are searched and
+    answered in parallel.
+
+    Args:
+        query (str): Search query
+        
+    Returns:
+        str: One answer per knowledge base, generated from its relevant documents
+    """
+    stores = [
+        ("Electric vehicles", electric_vehicles_vector_store, EV_SYSTEM_MESSAGE),
+        ("Gaming industry", games_market_vector_store, GAMES_SYSTEM_MESSAGE),
+    ]
+    stores = [store for store in stores if store[1] is not None]
+    if not stores:
+        return "Error: No vector stores initialized"
+    
+    try:
+        # One embeddings API call shared by both store queries
+        query_embedding = _embed_query(query)
+        with ThreadPoolExecutor(max_workers=len(stores)) as executor:
+            answers = list(executor.map(
+                lambda store: _generate_answer(store[1], store[2], query, query_embedding),
+                stores
+            ))
+        return "\n\n".join(f"{label}:\n{answer}" for (label, _, _), answer in zip(stores, answers))
+    except Exception as e:
+        return f"Error searching collections: {str(e)}"
+
 # ============================================================================
 # Agentic RAG Demo
 # ============================================================================
@@ -155,7 +224,12 @@ def rag_demo():
     3. Intelligent agent that selects appropriate tools
     4. Session-based memory management
     """
-    global electric_vehicles_vector_store, games_market_vector_store, rag_llm
+    global electric_vehicles_vector_store, games_market_vector_store, rag_llm, rag_embedding_function
+    
+    # Cached answers and embeddings belong to the previous stores
+    _embed_query.cache_clear()
+    _cached_ev_answer.cache_clear()
+    _cached_games_answer.cache_clear()
     
     print("=" * 70)
     print("Demo: Agentic RAG with Multiple Knowledge Bases")
@@ -171,6 +245,7 @@ def rag_demo():
     print("\n--- Step 1: Initialize Vector Store Manager ---")
     db = VectorStoreManager(api_key)
     loader_service = CorpusLoaderService(db)
+    rag_embedding_function = db.embedding_function
     print("Vector store manager initialized")
 
     print("\n--- Step 2: Initialize LLM ---")
@@ -180,52 +255,64 @@ def rag_demo():
     )
     print("LLM initialized (gpt-4o-mini, temp=0.3)")
 
-    print("\n--- Step 3: Load Gaming Industry PDF ---")
+    print("\n--- Step 3: Load Gaming Industry and Electric Vehicles PDFs ---")
     games_pdf = "TheGamingIndustry2024.pdf"
-    if not os.path.exists(games_pdf):
-        print(f"WARNING: PDF file '{games_pdf}' not found")
-        print("Skipping gaming industry vector store")
+    ev_pdf = "GlobalEVOutlook2025.pdf"
+    
+    def load_store(store_name: str, pdf_path: str) -> VectorStore:
+        if not os.path.exists(pdf_path):
+            return None
+        return loader_service.load_pdf(store_name=store_name, pdf_path=pdf_path)
+    
+    # The two PDFs are independent, so they are parsed and embedded concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        games_future = executor.submit(load_store, "games_market", games_pdf)
+        ev_future = executor.submit(load_store, "electric_vehicles", ev_pdf)
+    
+    try:
+        games_market_vector_store = games_future.result()
+        if games_market_vector_store is None:
+            print(f"WARNING: PDF file '{games_pdf}' not found")
+            print("Skipping gaming industry vector store")
+        else:
+            print(f"Loaded '{games_pdf}' into vector store")
+    except Exception as e:
+        print(f"ERROR loading gaming industry PDF: {e}")
         games_market_vector_store = None
-    else:
+    
+    try:
+        electric_vehicles_vector_store = ev_future.result()
+        if electric_vehicles_vector_store is None:
+            print(f"WARNING: PDF file '{ev_pdf}' not found")
+            print("Skipping electric vehicles vector store")
+        else:
+            print(f"Loaded '{ev_pdf}' into vector store")
+    except Exception as e:
+        print(f"ERROR loading electric vehicles PDF: {e}")
+        electric_vehicles_vector_store = None
+
+    if games_market_vector_store is not None:
+        # Test query
+        print("\n--- Step 4: Test Query on Gaming Industry ---")
+        test_query = "What's the state of virtual reality"
+        print(f"Query: {test_query}")
         try:
-            games_market_vector_store = loader_service.load_pdf(
-                store_name="games_market",
-                pdf_path=games_pdf,
-            )
-            print(f"Loaded '{games_pdf}' into vector store")
-            
-            # Test query
-            print("\n--- Step 4: Test Query on Gaming Industry ---")
-            test_query = "What's the state of virtual reality"
-            print(f"Query: {test_query}")
-            results = games_market_vector_store.query(query_text=test_query, n_results=2)
+            results = games_market_vector_store.query(query_texts=[test_query], n_results=2)
             print(f"Retrieved {len(results['documents'][0])} relevant chunks")
         except Exception as e:
-            print(f"ERROR loading gaming industry PDF: {e}")
+            print(f"ERROR querying gaming industry store: {e}")
             games_market_vector_store = None
 
-    print("\n--- Step 5: Load Electric Vehicles PDF ---")
-    ev_pdf = "GlobalEVOutlook2025.pdf"
-    if not os.path.exists(ev_pdf):
-        print(f"WARNING: PDF file '{ev_pdf}' not found")
-        print("Skipping electric vehicles vector store")
-        electric_vehicles_vector_store = None
-    else:
+    if electric_vehicles_vector_store is not None:
+        # Test query
+        print("\n--- Step 5: Test Query on Electric Vehicles ---")
+        test_query = "What was the number of electric car sales and their market share in Brazil in 2024?"
+        print(f"Query: {test_query}")
         try:
-            electric_vehicles_vector_store = loader_service.load_pdf(
-                store_name="electric_vehicles",
-                pdf_path=ev_pdf,
-            )
-            print(f"Loaded '{ev_pdf}' into vector store")
-            
-            # Test query
-            print("\n--- Step 6: Test Query on Electric Vehicles ---")
-            test_query = "What was the number of electric car sales and their market share in Brazil in 2024?"
-            print(f"Query: {test_query}")
-            results = electric_vehicles_vector_store.query(query_text=test_query, n_results=2)
+            results = electric_vehicles_vector_store.query(query_texts=[test_query], n_results=2)
             print(f"Retrieved {len(results['documents'][0])} relevant chunks")
         except Exception as e:
-            print(f"ERROR loading electric vehicles PDF: {e}")
+            print(f"ERROR querying electric vehicles store: {e}")
             electric_vehicles_vector_store = None
 
     # Check if at least one vector store was loaded
@@ -234,17 +321,17 @@ def rag_demo():
         print("Cannot proceed with Agentic RAG demo")
         return
 
-    print("\n--- Step 7: Initialize Agentic RAG Agent ---")
+    print("\n--- Step 6: Initialize Agentic RAG Agent ---")
     agentic_rag = Agent(
         model_name="gpt-4o-mini",
-        tools=[search_global_ev_collection, search_games_market_report_collection],
+        tools=[search_global_ev_collection, search_games_market_report_collection, search_all_collections],
         instructions=(
             "You are an Agentic RAG assistant that can intelligently decide which tools to use "
             "to answer user questions. Reason about the response, change the query and call the tool again if needed "
             "in order to get better results. Always explain your reasoning for tool selection and provide comprehensive answers."
         )
     )
-    print("Agentic RAG agent initialized with 2 tools")
+    print("Agentic RAG agent initialized with 3 tools")
 
     def print_messages(messages: List[BaseMessage], query: str):
         """Helper function to print messages in a readable format"""
@@ -252,11 +339,12 @@ def rag_demo():
         print(f"Total messages: {len(messages)}")
         for i, m in enumerate(messages, 1):
             role = getattr(m, 'role', 'unknown')
-            content = getattr(m, 'content', str(m))
+            content = m.content if isinstance(m, BaseMessage) else str(m)
             tool_calls = getattr(m, 'tool_calls', None)
             
-            # Truncate long content
-            content_preview = content[:150] + "..." if len(str(content)) > 150 else content
+            # Truncate long content, stringifying it (e.g. None) at most once
+            text = content if isinstance(content, str) else str(content)
+            content_preview = text[:150] + "..." if len(text) > 150 else text
             
             print(f"\n  Message {i}:")
             print(f"    Role: {role}")
@@ -5,6 +5,37 @@ from lib.llm import LLM
 
 load_dotenv()
 
+# Messages kept per session besides its persona; older turns drop out of the prompt
+MAX_HISTORY_MESSAGES = 64
+
+
+# ============================================================================
+# Personas
+# ============================================================================
+
+# Built once and shared by every session that uses them. Each persona is stored as
+# the first message of its session and never changes, so every request in the
+# session starts with the same prefix and can hit OpenAI's automatic prompt cache.
+
+FOOTBALL_COMMENTATOR_PERSONA = SystemMessage(
+    content=(
+        "You are a dramatic Premier League football commentator. "
+        "Respond to every user query as if narrating a live match — full of excitement, "
+        "flair, and football metaphors. Use phrases like 'What a move!' or "
+        "'Against all odds!' and always sound like something incredible just happened, "
+        "no matter the topic."
+    )
+)
+
+GPS_NAVIGATION_PERSONA = SystemMessage(
+    content=(
+        "You are a GPS navigation voice. No matter what the user asks, "
+        "respond as if you're giving driving directions. Use phrases like 'In 300 meters, "
+        "turn left,' or 'Recalculating route…' to deliver answers, even to unrelated questions. "
+        "Be dry, overly calm, and unintentionally funny."
+    )
+)
+
 
 # ============================================================================
 # ChatBot Implementation
@@ -67,18 +98,8 @@ def football_commentator_demo(chat_bot: ChatBot, memory: ShortTermMemory):
     memory.create_session(session_id)
     print(f"\nCreated session: {session_id}")
   
-    # Define persona
-    football_commentator_voice = SystemMessage(
-        content=(
-            "You are a dramatic Premier League football commentator. "
-            "Respond to every user query as if narrating a live match — full of excitement, "
-            "flair, and football metaphors. Use phrases like 'What a move!' or "
-            "'Against all odds!' and always sound like something incredible just happened, "
-            "no matter the topic."
-        )
-    )
-
-    memory.add(football_commentator_voice, session_id)
+    # Add persona
+    memory.add(FOOTBALL_COMMENTATOR_PERSONA, session_id, pinned=True)
     print(f"Added persona to session")
 
     # Test the persona
@@ -112,17 +133,8 @@ def gps_navigation_demo(chat_bot: ChatBot, memory: ShortTermMemory):
     memory.create_session(session_id)
     print(f"\nCreated session: {session_id}")
 
-    # Define persona
-    gps_navigation_voice = SystemMessage(
-        content=(
-            "You are a GPS navigation voice. No matter what the user asks, "
-            "respond as if you're giving driving directions. Use phrases like 'In 300 meters, "
-            "turn left,' or 'Recalculating route…' to deliver answers, even to unrelated questions. "
-            "Be dry, overly calm, and unintentionally funny."
-        )
-    )
-
-    memory.add(gps_navigation_voice, session_id)
+    # Add persona
+    memory.add(GPS_NAVIGATION_PERSONA, session_id, pinned=True)
     print(f"Added persona to session")
 
     # Test the persona
@@ -173,7 +185,7 @@ def main():
     to maintain separate conversation contexts simultaneously.
     """
     # Initialize memory and chatbot
-    memory = ShortTermMemory()
+    memory = ShortTermMemory(max_objects=MAX_HISTORY_MESSAGES)
     chat_bot = ChatBot()
     
     # Run demos
@@ -1,15 +1,34 @@
-from typing import TypedDict, List, Optional
-import json
+from typing import Any, Dict, Type, TypedDict, List, Optional
+import inspect
+from functools import partial
 from dotenv import load_dotenv
+from pydantic import BaseModel, create_model
 
 from lib.state_machine import StateMachine, Step, EntryPoint, Termination, Run
 from lib.llm import LLM
-from lib.messages import AIMessage, UserMessage, SystemMessage, ToolMessage, BaseMessage
-from lib.tooling import ToolCall, tool
+from lib.messages import AIMessage, UserMessage, SystemMessage, BaseMessage
+from lib.tooling import Tool, ToolCall, tool
 from lib.memory import ShortTermMemory
+from lib.agents import route_on_tool_calls, run_tool_calls
 
 load_dotenv()
 
+
+def _arguments_model(tool: Tool) -> Type[BaseModel]:
+    """Build a pydantic model of a tool's parameters from its signature
+    
+    Tool-call arguments are parsed and validated against it in one pass with
+    `model_validate_json`, so malformed calls are rejected before the tool runs.
+    """
+    fields = {
+        name: (
+            tool.type_hints.get(name, Any),
+            ... if param.default is inspect.Parameter.empty else param.default,
+        )
+        for name, param in tool.signature.parameters.items()
+    }
+    return create_model(f"{tool.name}_arguments", **fields)
+
 class AgentState(TypedDict):
     user_query: str  # The current user query being processed
     instructions: str  # System instructions for the agent
@@ -36,9 +55,17 @@ class MemoryAgent:
         self.instructions = instructions
         self.tools = tools if tools else []
         self.tools_map = {tool.name: tool for tool in self.tools}
+        self.tool_arguments = {tool.name: _arguments_model(tool) for tool in self.tools}
         self.model_name = model_name
         self.temperature = temperature
         
+        # One LLM client (and tool schema registry) shared by every step and session
+        self.llm = LLM(
+            model=self.model_name,
+            temperature=self.temperature,
+            tools=self.tools
+        )
+        
         # Initialize memory and state machine
         self.memory = ShortTermMemory()
         self.workflow = self._create_state_machine()
@@ -61,48 +88,36 @@ class MemoryAgent:
 
     def _llm_step(self, state: AgentState) -> AgentState:
         """Step logic: Process the current state through the LLM"""
-        # Initialize LLM
-        llm = LLM(
-            model=self.model_name,
-            temperature=self.temperature,
-            tools=self.tools
-        )
-
-        response = llm.invoke(state["messages"])
+        response = self.llm.invoke(state["messages"])
         tool_calls = response.tool_calls if response.tool_calls else None
 
         # Create AI message with content and tool calls
         ai_message = AIMessage(content=response.content, tool_calls=tool_calls)
         
+        # Append in place rather than copying the whole history every step. The
+        # list is this run's own: snapshots and session memory hold deep copies.
+        messages = state["messages"]
+        messages.append(ai_message)
+        
         return {
-            "messages": state["messages"] + [ai_message],
+            "messages": messages,
             "current_tool_calls": tool_calls,
             "session_id": state["session_id"]
         }
 
+    def _parse_arguments(self, tool: Tool, arguments: str) -> Dict[str, Any]:
+        """Parse and validate tool-call arguments against the tool's signature in one pass"""
+        return dict(self.tool_arguments[tool.name].model_validate_json(arguments))
+
     def _tool_step(self, state: AgentState) -> AgentState:
         """Step logic: Execute any pending tool calls"""
         tool_calls = state["current_tool_calls"] or []
-        tool_messages = []
         
-        for call in tool_calls:
-            function_name = call.function.name
-            function_args = json.loads(call.function.arguments)
-            tool_call_id = call.id
-            
-            # Efficient tool lookup using dictionary
-            tool = self.tools_map.get(function_name)
-            if tool:
-                result = tool(**function_args)
-                tool_message = ToolMessage(
-                    content=json.dumps(result),
-                    tool_call_id=tool_call_id,
-                    name=function_name,
-                )
-                tool_messages.append(tool_message)
+        messages = state["messages"]
+        messages.extend(run_tool_calls(self.tools_map, tool_calls, parse_arguments=self._parse_arguments))
         
         return {
-            "messages": state["messages"] + tool_messages,
+            "messages": messages,
             "current_tool_calls": None,
             "session_id": state["session_id"]
         }
@@ -121,16 +136,14 @@ class MemoryAgent:
         machine.add_steps([entry, message_prep, llm_processor, tool_executor, termination])
         
         # Define router function
-        def check_tool_calls(state: AgentState) -> Step:
-            """Determine next step based on whether there are pending tool calls"""
-            if state.get("current_tool_calls"):
-                return tool_executor
-            return termination
-        
         # Connect workflow steps
         machine.connect(entry, message_prep)
         machine.connect(message_prep, llm_processor)
-        machine.connect(llm_processor, [tool_executor, termination], check_tool_calls)
+        machine.connect(
+            llm_processor,
+            [tool_executor, termination],
+            partial(route_on_tool_calls, tool_executor=tool_executor, termination=termination),
+        )
         machine.connect(tool_executor, llm_processor)
         
         return machine
@@ -193,7 +206,25 @@ class MemoryAgent:
         """
         self.memory.reset(session_id)
 
-@tool
+GAMES_DATA = [
+    {"Game": "The Legend of Zelda: Breath of the Wild", "Platform": "Switch", "Score": 98},
+    {"Game": "Super Mario Odyssey", "Platform": "Switch", "Score": 97},
+    {"Game": "Metroid Prime", "Platform": "GameCube", "Score": 97},
+    {"Game": "Super Smash Bros. Brawl", "Platform": "Wii", "Score": 93},
+    {"Game": "Mario Kart 8 Deluxe", "Platform": "Switch", "Score": 92},
+    {"Game": "Fire Emblem: Awakening", "Platform": "3DS", "Score": 92},
+    {"Game": "Donkey Kong Country Returns", "Platform": "Wii", "Score": 87},
+    {"Game": "Luigi's Mansion 3", "Platform": "Switch", "Score": 86},
+    {"Game": "Pikmin 3", "Platform": "Wii U", "Score": 85},
+    {"Game": "Animal Crossing: New Leaf", "Platform": "3DS", "Score": 88}
+]
+
+# The dataset is static, so both orderings are computed once at import. Each is a
+# stable sort, matching sorted(..., reverse=top) for games with equal scores.
+_GAMES_BY_SCORE_DESC = sorted(GAMES_DATA, key=lambda x: x['Score'], reverse=True)
+_GAMES_BY_SCORE_ASC = sorted(GAMES_DATA, key=lambda x: x['Score'])
+
+@tool(pure=True)
 def get_games(num_games: int = 1, top: bool = True) -> str:
     """Returns the top or bottom N games with highest or lowest scores.
     
@@ -204,21 +235,8 @@ def get_games(num_games: int = 1, top: bool = True) -> str:
     Returns:
         List of game dictionaries sorted by score
     """
-    data = [
-        {"Game": "The Legend of Zelda: Breath of the Wild", "Platform": "Switch", "Score": 98},
-        {"Game": "Super Mario Odyssey", "Platform": "Switch", "Score": 97},
-        {"Game": "Metroid Prime", "Platform": "GameCube", "Score": 97},
-        {"Game": "Super Smash Bros. Brawl", "Platform": "Wii", "Score": 93},
-        {"Game": "Mario Kart 8 Deluxe", "Platform": "Switch", "Score": 92},
-        {"Game": "Fire Emblem: Awakening", "Platform": "3DS", "Score": 92},
-        {"Game": "Donkey Kong Country Returns", "Platform": "Wii", "Score": 87},
-        {"Game": "Luigi's Mansion 3", "Platform": "Switch", "Score": 86},
-        {"Game": "Pikmin 3", "Platform": "Wii U", "Score": 85},
-        {"Game": "Animal Crossing: New Leaf", "Platform": "3DS", "Score": 88}
-    ]
-    # Sort the games list by Score
-    # If top is True, descending order
-    sorted_games = sorted(data, key=lambda x: x['Score'], reverse=top)
+    # If top is True, highest scores first
+    sorted_games = _GAMES_BY_SCORE_DESC if top else _GAMES_BY_SCORE_ASC
     
     # Return the N games
     return sorted_games[:num_games]
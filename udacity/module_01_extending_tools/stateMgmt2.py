@@ -1,11 +1,12 @@
 from typing import TypedDict, List, Optional
-import json
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from lib.state_machine import StateMachine, Step, EntryPoint, Termination
 from lib.llm import LLM
 from lib.messages import AIMessage, UserMessage, SystemMessage, ToolMessage
 from lib.tooling import ToolCall, tool
+from lib.jsonutil import json_loads, json_dumps
 
 load_dotenv()
 
@@ -28,6 +29,24 @@ class AgentState(TypedDict):
 # ============================================================================
 # Tool Definitions
 # ============================================================================
+GAMES_DATA = [
+    {"Game": "The Legend of Zelda: Breath of the Wild", "Platform": "Switch", "Score": 98},
+    {"Game": "Super Mario Odyssey", "Platform": "Switch", "Score": 97},
+    {"Game": "Metroid Prime", "Platform": "GameCube", "Score": 97},
+    {"Game": "Super Smash Bros. Brawl", "Platform": "Wii", "Score": 93},
+    {"Game": "Mario Kart 8 Deluxe", "Platform": "Switch", "Score": 92},
+    {"Game": "Fire Emblem: Awakening", "Platform": "3DS", "Score": 92},
+    {"Game": "Donkey Kong Country Returns", "Platform": "Wii", "Score": 87},
+    {"Game": "Luigi's Mansion 3", "Platform": "Switch", "Score": 86},
+    {"Game": "Pikmin 3", "Platform": "Wii U", "Score": 85},
+    {"Game": "Animal Crossing: New Leaf", "Platform": "3DS", "Score": 88}
+]
+
+# The dataset is static, so both orderings are computed once at import. Each is a
+# stable sort, matching sorted(..., reverse=top) for games with equal scores.
+_GAMES_BY_SCORE_DESC = sorted(GAMES_DATA, key=lambda x: x['Score'], reverse=True)
+_GAMES_BY_SCORE_ASC = sorted(GAMES_DATA, key=lambda x: x['Score'])
+
 @tool
 def get_games(num_games: int = 1, top: bool = True) -> str:
     """Returns the top or bottom N games with highest or lowest scores.
@@ -39,21 +58,8 @@ def get_games(num_games: int = 1, top: bool = True) -> str:
     Returns:
         List of game dictionaries sorted by score
     """
-    data = [
-        {"Game": "The Legend of Zelda: Breath of the Wild", "Platform": "Switch", "Score": 98},
-        {"Game": "Super Mario Odyssey", "Platform": "Switch", "Score": 97},
-        {"Game": "Metroid Prime", "Platform": "GameCube", "Score": 97},
-        {"Game": "Super Smash Bros. Brawl", "Platform": "Wii", "Score": 93},
-        {"Game": "Mario Kart 8 Deluxe", "Platform": "Switch", "Score": 92},
-        {"Game": "Fire Emblem: Awakening", "Platform": "3DS", "Score": 92},
-        {"Game": "Donkey Kong Country Returns", "Platform": "Wii", "Score": 87},
-        {"Game": "Luigi's Mansion 3", "Platform": "Switch", "Score": 86},
-        {"Game": "Pikmin 3", "Platform": "Wii U", "Score": 85},
-        {"Game": "Animal Crossing: New Leaf", "Platform": "3DS", "Score": 88}
-    ]
-    # Sort the games list by Score
-    # If top is True, descending order
-    sorted_games = sorted(data, key=lambda x: x['Score'], reverse=top)
+    # If top is True, highest scores first
+    sorted_games = _GAMES_BY_SCORE_DESC if top else _GAMES_BY_SCORE_ASC
     
     # Return the N games
     return sorted_games[:num_games]
@@ -64,6 +70,16 @@ tools = [get_games]
 tools_map = {tool.name: tool for tool in tools}
 
 
+@lru_cache(maxsize=None)
+def get_llm() -> LLM:
+    """Shared tool-enabled LLM, built on first use and reused by every llm_step"""
+    return LLM(
+        model="gpt-4o-mini",
+        temperature=0.3,
+        tools=tools,
+    )
+
+
 # ============================================================================
 # Step Functions
 # ============================================================================
@@ -97,14 +113,7 @@ def llm_step(state: AgentState) -> AgentState:
         Updated state with LLM response and any tool calls
     """
 
-    # Initialize LLM
-    llm = LLM(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        tools=tools,
-    )
-
-    response = llm.invoke(state["messages"])
+    response = get_llm().invoke(state["messages"])
     tool_calls = response.tool_calls if response.tool_calls else None
 
     # Create AI message with content and tool calls
@@ -129,7 +138,7 @@ def tool_step(state: AgentState) -> AgentState:
     
     for call in tool_calls:
         function_name = call.function.name
-        function_args = json.loads(call.function.arguments)
+        function_args = json_loads(call.function.arguments)
         tool_call_id = call.id
         
         # Efficient tool lookup using dictionary
@@ -138,7 +147,7 @@ def tool_step(state: AgentState) -> AgentState:
             result = tool(**function_args)
             tool_messages.append(
                 ToolMessage(
-                    content=json.dumps(result),
+                    content=json_dumps(result),
                     tool_call_id=tool_call_id,
                     name=function_name,
                 )
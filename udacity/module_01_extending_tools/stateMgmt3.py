@@ -1,15 +1,20 @@
 
-from typing import TypedDict, List, Optional, Union
+from typing import Dict, TypedDict, List, Optional, Union
+import hashlib
 import json
+from functools import partial
 from dotenv import load_dotenv
 
 from lib.state_machine import StateMachine, Step, EntryPoint, Termination, Run
 from lib.llm import LLM
-from lib.messages import AIMessage, UserMessage, SystemMessage, ToolMessage
+from lib.messages import AIMessage, UserMessage, SystemMessage, BaseMessage
 from lib.tooling import Tool, ToolCall, tool
+from lib.llm_cache import LLMResponseCache, DEFAULT_CACHE_PATH
+from lib.agents import route_on_tool_calls, run_tool_calls
 
 load_dotenv()
 
+
 class AgentState(TypedDict):
     """State schema for agent workflow with LLM and tools.
     
@@ -30,7 +35,8 @@ class Agent:
                  model_name: str,
                  instructions: str, 
                  tools: List[Tool] = None,
-                 temperature: float = 0.7):
+                 temperature: float = 0.7,
+                 response_cache_path: Optional[str] = None):
         """
         Initialize an Agent instance
         
@@ -39,11 +45,31 @@ class Agent:
             instructions: System instructions for the agent
             tools: Optional list of tools available to the agent
             temperature: Temperature parameter for LLM (default: 0.7)
+            response_cache_path: Optional SQLite file that persists the exact-match
+                response cache across runs (in-memory only if None)
         """
         self.instructions = instructions
+        # Built once: every run starts from the same system message, and cache
+        # keys use a hash of the instructions instead of re-serialising them
+        self._system_message = SystemMessage(content=instructions)
+        self._instructions_hash = hashlib.sha256(instructions.encode()).hexdigest()
         self.tools = tools if tools else []
+        self.tools_map = {tool.name: tool for tool in self.tools}
         self.model_name = model_name
         self.temperature = temperature
+        
+        # One LLM client (and tool schema registry) shared by every step and run
+        self.llm = LLM(
+            model=self.model_name,
+            temperature=self.temperature,
+            tools=self.tools
+        )
+        
+        # Exact-match cache of LLM responses, keyed by model settings and the full
+        # message history. Clear it with `agent.response_cache.clear()`.
+        self.response_cache: Union[Dict[str, AIMessage], LLMResponseCache] = (
+            LLMResponseCache(response_cache_path) if response_cache_path else {}
+        )
                 
         # Initialize state machine
         self.workflow = self._create_state_machine()
@@ -51,8 +77,12 @@ class Agent:
     def _prepare_messages_step(self, state: AgentState) -> AgentState:
         """Step logic: Prepare messages for LLM consumption"""
 
+        if state["instructions"] == self.instructions:
+            system_message = self._system_message
+        else:
+            system_message = SystemMessage(content=state["instructions"])
         messages = [
-            SystemMessage(content=state["instructions"]),
+            system_message,
             UserMessage(content=state["user_query"])
         ]
         
@@ -60,52 +90,57 @@ class Agent:
             "messages": messages
         }
 
+    def _cache_key(self, messages: List[BaseMessage]) -> str:
+        """Hash of everything that determines the LLM response for `messages`"""
+        history = [
+            (
+                m.role,
+                self._instructions_hash if m is self._system_message else m.content,
+                getattr(m, "tool_call_id", None),
+                [(c.id, c.function.name, c.function.arguments) for c in getattr(m, "tool_calls", None) or []],
+            )
+            for m in messages
+        ]
+        payload = {
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "tools": [t.name for t in self.tools],
+            "messages": history,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
     def _llm_step(self, state: AgentState) -> AgentState:
         """Step logic: Process the current state through the LLM"""
-
-        # Initialize LLM
-        llm = LLM(
-            model=self.model_name,
-            temperature=self.temperature,
-            tools=self.tools
-        )
-
-        response = llm.invoke(state["messages"])
-        tool_calls = response.tool_calls if response.tool_calls else None
-
-        # Create AI message with content and tool calls
-        ai_message = AIMessage(content=response.content, tool_calls=tool_calls)
+        
+        # Identical requests are answered from the cache without a network call
+        key = self._cache_key(state["messages"])
+        ai_message = self.response_cache.get(key)
+        if ai_message is None:
+            response = self.llm.invoke(state["messages"])
+
+            # Create AI message with content and tool calls
+            ai_message = AIMessage(content=response.content, tool_calls=response.tool_calls or None)
+            self.response_cache[key] = ai_message
+        tool_calls = ai_message.tool_calls
+        
+        # Append in place: each run owns its list and snapshots hold their own copy
+        messages = state["messages"]
+        messages.append(ai_message)
         
         return {
-            "messages": state["messages"] + [ai_message],
+            "messages": messages,
             "current_tool_calls": tool_calls
         }
 
     def _tool_step(self, state: AgentState) -> AgentState:
         """Step logic: Execute any pending tool calls"""
-        tool_calls = state["current_tool_calls"] or []
-        tool_messages = []
-        
-        for call in tool_calls:
-            # Access tool call data correctly
-            function_name = call.function.name
-            function_args = json.loads(call.function.arguments)
-            tool_call_id = call.id
-            # Find the matching tool
-            tool = next((t for t in self.tools if t.name == function_name), None)
-            if tool:
-                result = tool(**function_args)
-                tool_messages.append(
-                    ToolMessage(
-                        content=json.dumps(result), 
-                        tool_call_id=tool_call_id, 
-                        name=function_name, 
-                    )
-                )
+        tool_messages = run_tool_calls(self.tools_map, state["current_tool_calls"] or [])
         
         # Clear tool calls and add results to messages
+        messages = state["messages"]
+        messages.extend(tool_messages)
         return {
-            "messages": state["messages"] + tool_messages,
+            "messages": messages,
             "current_tool_calls": None
         }
 
@@ -127,13 +162,11 @@ class Agent:
         machine.connect(message_prep, llm_processor)
         
         # Transition based on whether there are tool calls
-        def check_tool_calls(state: AgentState) -> Union[Step[AgentState], str]:
-            """Transition logic: Check if there are tool calls"""
-            if state.get("current_tool_calls"):
-                return tool_executor
-            return termination
-        
-        machine.connect(llm_processor, [tool_executor, termination], check_tool_calls)
+        machine.connect(
+            llm_processor,
+            [tool_executor, termination],
+            partial(route_on_tool_calls, tool_executor=tool_executor, termination=termination),
+        )
         machine.connect(tool_executor, llm_processor)  # Go back to llm after tool execution
         
         return machine
@@ -160,13 +193,13 @@ class Agent:
         return run_object
 
 
-@tool
+@tool(pure=True)
 def power(base:float, exponent:float):
     """Exponentatiation: base to the power of exponent"""
     
     return base ** exponent
 
-@tool
+@tool(pure=True)
 def multiply(number_a:float, number_b:float):
     """Multiplication: number_a times number_b"""
     
@@ -185,6 +218,8 @@ def math_state_loops():
     math_agent = Agent(
         model_name="gpt-4o-mini",
         tools=tools,
+        # Reruns of the demo reuse the responses cached on disk
+        response_cache_path=DEFAULT_CACHE_PATH,
         instructions=(
             "You're an AI Agent very good with math operations "
             "You can answer multistep questions by sequentially calling functions. "
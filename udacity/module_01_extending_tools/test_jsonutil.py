@@ -0,0 +1,39 @@
+import json
+from datetime import date
+
+import pytest
+
+from lib import jsonutil
+from lib.jsonutil import json_dumps, json_loads
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(jsonutil, "orjson", None)
+    elif jsonutil.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_big_int_tool_result(backend):
+    # power(base=2, exponent=100) from the stateMgmt3 demo
+    assert json.loads(json_dumps(2 ** 100)) == 2 ** 100
+
+
+def test_non_string_dict_keys(backend):
+    assert json.loads(json_dumps({1: "a", 2: "b"})) == {"1": "a", "2": "b"}
+
+
+def test_unserializable_value_falls_back_to_str(backend):
+    assert json.loads(json_dumps({"when": date(2024, 1, 2)})) == {"when": "2024-01-02"}
+
+
+def test_round_trip(backend):
+    payload = {"answer": 45, "steps": [9.0, "multiply"], "done": True, "error": None}
+    assert json_loads(json_dumps(payload)) == payload
+
+
+def test_malformed_json_raises_value_error(backend):
+    with pytest.raises(ValueError):
+        json_loads('{"base": 3,')
@@ -1,11 +1,15 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict
 from dotenv import load_dotenv
-from tavily import TavilyClient
 from lib.agents import Agent
 from lib.tooling import tool
 
+if TYPE_CHECKING:
+    from tavily import TavilyClient
+
 load_dotenv()
 
 
@@ -13,6 +17,20 @@ load_dotenv()
 # Web Search Tool Definition
 # ============================================================================
 
+# Search results go back into the LLM's context, so only a trimmed view is kept
+MAX_SEARCH_RESULTS = 5
+MAX_SNIPPET_CHARS = 280
+MAX_ANSWER_CHARS = 1000
+
+
+@lru_cache(maxsize=None)
+def _tavily_client(api_key: str) -> "TavilyClient":
+    """Tavily client shared by every search made with `api_key`"""
+    # Imported on first search, so loading this module doesn't pull in tavily
+    # and its HTTP stack
+    from tavily import TavilyClient
+    return TavilyClient(api_key=api_key)
+
 
 @tool
 def web_search(query: str, search_depth: str = "advanced") -> Dict:
@@ -25,13 +43,6 @@ def web_search(query: str, search_depth: str = "advanced") -> Dict:
     Returns:
         Dictionary containing search results with answer and sources
     """
-    if TavilyClient is None:
-        return {
-            "error": "Tavily client not available. Please install: pip install tavily-python",
-            "answer": "Unable to perform web search - Tavily package not installed",
-            "results": []
-        }
-    
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         return {
@@ -41,8 +52,15 @@ def web_search(query: str, search_depth: str = "advanced") -> Dict:
         }
     
     try:
-        client = TavilyClient(api_key=api_key)
-        
+        client = _tavily_client(api_key)
+    except ImportError:
+        return {
+            "error": "Tavily client not available. Please install: pip install tavily-python",
+            "answer": "Unable to perform web search - Tavily package not installed",
+            "results": []
+        }
+    
+    try:
         # Perform the search
         search_result = client.search(
             query=query,
@@ -52,10 +70,18 @@ def web_search(query: str, search_depth: str = "advanced") -> Dict:
             include_images=False
         )
         
-        # Format the results
+        # Format the results, keeping only what the LLM needs to answer and cite
+        results = [
+            {
+                "title": result.get("title", ""),
+                "url": result.get("url", ""),
+                "snippet": (result.get("content") or "")[:MAX_SNIPPET_CHARS],
+            }
+            for result in search_result.get("results", [])[:MAX_SEARCH_RESULTS]
+        ]
         formatted_results = {
-            "answer": search_result.get("answer", ""),
-            "results": search_result.get("results", []),
+            "answer": (search_result.get("answer") or "")[:MAX_ANSWER_CHARS],
+            "results": results,
             "search_metadata": {
                 "timestamp": datetime.now().isoformat(),
                 "query": query,
@@ -109,11 +135,19 @@ def demo_web_search_agent():
         tools=tools
     )
 
+    query1 = "Who won the 2024 Nobel Prize in Physics?"
+    query2 = "What are the most recent developments in AI technology?"
+
+    # The queries are independent, so both LLM + search chains run at the same
+    # time. Each gets its own session so neither sees the other's messages.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future1 = executor.submit(web_agent.invoke, query=query1, session_id="query1")
+        future2 = executor.submit(web_agent.invoke, query=query2, session_id="query2")
+        run1, run2 = future1.result(), future2.result()
+
     # Demo 1: Time-sensitive query
     print("\n--- Query 1: Time-Sensitive Information ---")
-    query1 = "Who won the 2024 Nobel Prize in Physics?"
     print(f"User: {query1}")
-    run1 = web_agent.invoke(query=query1)
     final_state1 = run1.get_final_state()
     response1 = final_state1["messages"][-1].content
     print(f"\nBot: {response1}")
@@ -121,9 +155,7 @@ def demo_web_search_agent():
 
     # Demo 2: Recent developments
     print("\n--- Query 2: Recent Developments ---")
-    query2 = "What are the most recent developments in AI technology?"
     print(f"User: {query2}")
-    run2 = web_agent.invoke(query=query2)
     final_state2 = run2.get_final_state()
     response2 = final_state2["messages"][-1].content
     print(f"\nBot: {response2}")